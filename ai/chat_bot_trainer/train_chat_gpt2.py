@@ -1,14 +1,20 @@
 """
 GPT-2 Chat Model Training Script - Optimized Version
 Trains GPT-2 model on processed JSON chat data
+Multi-GPU: torchrun --nproc_per_node=<gpus> ai/chat_bot_trainer/train_chat_gpt2.py
 """
 import os
 import json
+import hashlib
+import importlib.util
+import inspect
+import itertools
+import multiprocessing
 import torch
 from datetime import datetime
 from transformers import (
     GPT2LMHeadModel, 
-    GPT2Tokenizer, 
+    GPT2TokenizerFast, 
     DataCollatorForLanguageModeling,
     Trainer, 
     TrainingArguments
@@ -16,8 +22,21 @@ from transformers import (
 from torch.utils.data import Dataset
 import logging
 
+# orjson parses JSON in Rust and is optional, stdlib json is the fallback
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
 # Set up logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+logger = logging.getLogger(__name__)
+
+# TOKENIZERS_PARALLELISM is left unset on purpose: the Rust tokenizer then uses all cores
+# until the first fork (dataloader workers, tokenize pool) and turns itself off after it,
+# forcing "true" would let forked processes deadlock on its thread pool
 
 # Configure ML tracking directories
 def setup_ml_tracking_dirs(output_dir):
@@ -33,53 +52,110 @@ def setup_ml_tracking_dirs(output_dir):
     os.environ["MLFLOW_TRACKING_URI"] = f"file://{mlruns_dir}"
     os.environ["WANDB_CACHE_DIR"] = os.path.join(wandb_dir, "cache")
     
-    print(f"📊 ML tracking configured: wandb={wandb_dir}, mlruns={mlruns_dir}")
+    logger.info("📊 ML tracking configured: wandb=%s, mlruns=%s", wandb_dir, mlruns_dir)
+
+# layout version of tokenized dataset cache files, bump when cached content changes
+TOKENIZED_CACHE_VERSION = 3
+# datasets with at least this many conversations are tokenized in worker processes
+PARALLEL_TOKENIZE_MIN_TEXTS = 20000
+
+# tokenizer of the current tokenize worker process (set once by _init_tokenize_worker)
+_worker_tokenizer = None
 
+# every worker gets its own tokenizer copy, sharding across processes avoids
+# the lock contention of one shared Rust tokenizer
+def _init_tokenize_worker(tokenizer):
+    global _worker_tokenizer
+    # processes give the parallelism, keep each worker tokenizer single threaded
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    _worker_tokenizer = tokenizer
+
+def _tokenize_shard(shard):
+    texts, kwargs = shard
+    return _worker_tokenizer(texts, **kwargs)["input_ids"]
 
 class JSONChatDataset(Dataset):
     """Loads JSON chat data, validates metadata, and creates tokenized training examples."""
     # setup components that will be used in methods for data loading and processing
-    def __init__(self, tokenizer, json_path=None, block_size=512):
+    def __init__(self, tokenizer, json_path=None, block_size=512, pack=True):
         # setup tokenizer 
         self.tokenizer = tokenizer
         # setup block size
         self.block_size = block_size
+        # pack conversations into full block_size sequences instead of one (padded) example each
+        self.pack = pack
         
         # call function to find training file if not provided
         if json_path is None:
             json_path = self._find_training_file()
 
-        # get JSON data from path and put it inside data var 
-        print(f"📂 Loading processed chat data from: {json_path}")
-        with open(json_path, "r", encoding="utf-8") as f:
-            self.data = json.load(f)
+        # read raw JSON bytes once (used for cache key and parsing)
+        logger.info("📂 Loading processed chat data from: %s", json_path)
+        with open(json_path, "rb") as f:
+            raw = f.read()
+
+        # tokenized examples of the same file, tokenizer and block size are cached next to the JSON
+        cache_path = f"{json_path}.tok_{self._cache_key(raw)}.pt"
+        if os.path.exists(cache_path):
+            logger.info("⚡ Using cached tokenized dataset: %s", os.path.basename(cache_path))
+            # memory-map cached tensors, OS pages in only the parts training touches
+            try:
+                cached = torch.load(cache_path, mmap=True)
+            except TypeError:
+                # torch < 2.1 has no mmap argument
+                cached = torch.load(cache_path)
+            self.metadata = cached["metadata"]
+            self.tokens = cached["tokens"]
+            self.offsets = cached["offsets"]
+            logger.info("🎯 Loaded %d tokenized training examples", len(self))
+            return
+
+        # get JSON data and put it inside data var (local, not kept after tokenization)
+        data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw.decode("utf-8"))
+        del raw
 
         # call function that validates metadata & conversations
-        self._validate_json()
+        self._validate_json(data)
 
         # Extract fom data
         # put in var metadata about training data
-        self.metadata = self.data["metadata"]
+        self.metadata = data["metadata"]
         # put in var training conversations inside data called by _build_examples
-        self.conversations = self.data["training_conversations"]
-        print(f"💬 Loaded {len(self.conversations)} training conversations")
+        self.conversations = data["training_conversations"]
+        logger.info("💬 Loaded %d training conversations", len(self.conversations))
 
         # Convert conversations to tokenized examples
-        self.examples = self._build_examples()
+        self.tokens, self.offsets = self._build_examples()
+        # only tokens and metadata are needed for training, free parsed conversations
+        # (smaller memory during training and for forked dataloader workers)
+        del self.conversations, data
+        # save for next run (skips JSON parsing and tokenization)
+        # write to per-process temp file and rename, DDP ranks may build the same cache at once
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        torch.save({"metadata": self.metadata, "tokens": self.tokens, "offsets": self.offsets}, tmp_path)
+        os.replace(tmp_path, cache_path)
+        logger.info("💾 Tokenized dataset cached: %s", os.path.basename(cache_path))
+    # function that builds cache key for tokenized dataset
+    # changes when training file content, tokenizer (incl. added special tokens) or block size change
+    def _cache_key(self, raw):
+        """Hash of training data and tokenization settings"""
+        key = hashlib.sha1(raw)
+        key.update(f"{TOKENIZED_CACHE_VERSION}:{self.tokenizer.name_or_path}:{len(self.tokenizer)}:{self.block_size}:{self.pack}".encode("utf-8"))
+        return key.hexdigest()[:16]
     # function that validates metadata & conversations
-    def _validate_json(self):
-        """Checks JSON structure and consistency using self.data."""
-        # inside self.data check if metadata field exists
-        if "metadata" not in self.data:
+    def _validate_json(self, data):
+        """Checks JSON structure and consistency of parsed data."""
+        # inside data check if metadata field exists
+        if "metadata" not in data:
             raise ValueError("JSON missing 'metadata' field")
-        # inside self.data check if training_conversations field exists
-        if "training_conversations" not in self.data:
+        # inside data check if training_conversations field exists
+        if "training_conversations" not in data:
             raise ValueError("JSON missing 'training_conversations' field")
-        # inside self.data check if training_conversations is not empty
-        if len(self.data["training_conversations"]) == 0:
+        # inside data check if training_conversations is not empty
+        if len(data["training_conversations"]) == 0:
             raise ValueError("No conversations found in training data")
         
-        print(f"✅ JSON validation passed: {len(self.data['training_conversations'])} conversations found")
+        logger.info("✅ JSON validation passed: %d conversations found", len(data["training_conversations"]))
     # function that finds best available training file
     #1. first try to load ai/training_data/parsed_data"
     #2. if not found look for default file chat_conversations_v1_parsed.json
@@ -93,51 +169,109 @@ class JSONChatDataset(Dataset):
             raise FileNotFoundError(f"Directory not found: {parsed_data_dir}")
         
         # Look for available JSON files and pick first one
-        json_files = [f for f in os.listdir(parsed_data_dir) if f.endswith('.json')]
+        # (one scandir pass, file type and size come from the directory entry)
+        with os.scandir(parsed_data_dir) as entries:
+            json_files = [entry for entry in entries if entry.name.endswith('.json') and entry.is_file()]
         if not json_files:
             raise FileNotFoundError(f"No JSON files found in {parsed_data_dir}")
         
         # Use first available JSON file
-        training_file = os.path.join(parsed_data_dir, json_files[0])
-        print(f"🎯 Using training file: {os.path.basename(training_file)}")
-        return training_file 
+        entry = json_files[0]
+        logger.info("🎯 Using training file: %s (%.1f MB)", entry.name, entry.stat().st_size / 1e6)
+        return entry.path
     # function that builds tokenized examples from conversations that are inside data
-    #1. loops through self.data inside conversations key and extracts formatted_training_text
-    #2. tokenizes text with truncation and max length
-    #3. appends input ids to examples for model to read
+    #1. collects formatted_training_text of every conversation from self.conversations
+    #2. tokenizes all texts (batched call, sharded across processes for large datasets)
+    #3. packing: joins all conversations separated by eos token and cuts them into block_size chunks
+    #   (texts already ending in <|endoftext|> get no extra eos, one separator per document)
+    #   (no padding, long conversations are not truncated, last shorter chunk is kept)
+    #   no packing: one example per conversation truncated to block_size
+    #4. stores all examples in one preallocated flat int32 tensor, example i is tokens[offsets[i]:offsets[i + 1]]
+    #   (one allocation instead of a tensor per example, half the memory of int64)
     def _build_examples(self):
-        # placeholder for examples
-        examples = []
-        # loops through self.data dictionary conversations
-        for convo in self.conversations:
-            # inside conversations look for formatted_training_text field
-            # field contains the full text formated for training
-            text = convo["formatted_training_text"]
-            # print conversation id and exchange count
-            print(f"📝 Processing conversation {convo['id']}: {convo['exchange_count']} exchanges")
-            # print preview of formatted training text
-            print(f"   Preview: {text[:150]}...")
-            # tokenize text with truncation and max length
-            tokens = self.tokenizer(
-                text,
-                truncation=True,
-                max_length=self.block_size,
-                return_tensors="pt"
-            )
-            # append input ids to examples for model to read
-            examples.append(tokens["input_ids"].squeeze())
-        # log created examples
-        print(f"🎯 Created {len(examples)} tokenized training examples")
-        return examples
+        # inside conversations formatted_training_text field contains the full text formated for training
+        texts = [convo["formatted_training_text"] for convo in self.conversations]
+        input_ids = self._tokenize(texts)
+        # packing appends eos token after every conversation that doesn't already end with it
+        eos_id = self.tokenizer.eos_token_id
+        if self.pack:
+            needs_sep = [not ids or ids[-1] != eos_id for ids in input_ids]
+        else:
+            needs_sep = [False] * len(input_ids)
+        num_seps = sum(needs_sep)
+        total_len = sum(len(ids) for ids in input_ids) + num_seps
+        # input ids of all examples for model to read, allocated once and filled per conversation
+        # (no intermediate python list of every token)
+        tokens = torch.empty(total_len, dtype=torch.int32)
+        pos = 0
+        for ids, sep in zip(input_ids, needs_sep):
+            tokens[pos:pos + len(ids)] = torch.as_tensor(ids, dtype=torch.int32)
+            pos += len(ids)
+            if sep:
+                tokens[pos] = eos_id
+                pos += 1
+        if self.pack:
+            # every block starts block_size after previous one, last block may be shorter
+            bounds = list(range(0, total_len, self.block_size)) + [total_len]
+        else:
+            bounds = [0] + list(itertools.accumulate(len(ids) for ids in input_ids))
+        offsets = torch.tensor(bounds, dtype=torch.long)
+        # log summary of created examples
+        total_exchanges = sum(convo.get("exchange_count", 0) for convo in self.conversations)
+        total_tokens = total_len - num_seps
+        logger.info("📝 Processed %d conversations: %d exchanges, %d tokens", len(texts), total_exchanges, total_tokens)
+        # previews only built when debug logging is on (LOG_LEVEL=DEBUG)
+        if logger.isEnabledFor(logging.DEBUG):
+            for text in texts[:3]:
+                logger.debug("   Preview: %s...", text[:150])
+        logger.info("🎯 Created %d tokenized training examples", len(offsets) - 1)
+        return tokens, offsets
+    # function that tokenizes texts, returns list of input ids per text (same order as texts)
+    #1. small datasets: one batched call of the tokenizer
+    #2. large datasets: texts split into contiguous shards, one shard per worker process
+    def _tokenize(self, texts):
+        kwargs = {
+            "truncation": not self.pack,
+            "max_length": None if self.pack else self.block_size,
+            "add_special_tokens": False
+        }
+        num_proc = max(1, (os.cpu_count() or 1) // 2)
+        if len(texts) < PARALLEL_TOKENIZE_MIN_TEXTS or num_proc == 1:
+            return self.tokenizer(texts, **kwargs)["input_ids"]
+
+        shard_size = -(-len(texts) // num_proc)
+        shards = [(texts[i:i + shard_size], kwargs) for i in range(0, len(texts), shard_size)]
+        logger.info("⚡ Tokenizing %d conversations in %d worker processes", len(texts), len(shards))
+        with multiprocessing.Pool(len(shards), initializer=_init_tokenize_worker, initargs=(self.tokenizer,)) as pool:
+            results = pool.map(_tokenize_shard, shards)
+        return list(itertools.chain.from_iterable(results))
     # functions required by Dataset class
     def __len__(self):
-        return len(self.examples)
-    # function to get item at index
+        return len(self.offsets) - 1
+    # function to get item at index (int32 view into the flat token tensor, no copy)
+    # dict with input_ids lets Trainer group examples of similar length (group_by_length)
+    # collator casts to int64 once per batch (LongInputCollator)
     def __getitem__(self, idx):
-        return self.examples[idx]
+        start, end = self.offsets[idx].item(), self.offsets[idx + 1].item()
+        return {"input_ids": self.tokens[start:end]}
     # function to get metadata
     def get_metadata(self):
         return self.metadata
+# wraps a data collator so batches reach the model as int64 (embedding lookup needs long ids)
+# dataset items stay int32 until a whole batch is collated
+# (class instead of closure so dataloader workers can pickle it on spawn platforms)
+class LongInputCollator:
+    """Data collator wrapper that casts input_ids and labels to int64."""
+    def __init__(self, collator):
+        self.collator = collator
+
+    def __call__(self, features):
+        batch = self.collator(features)
+        for key in ("input_ids", "labels"):
+            if key in batch:
+                batch[key] = batch[key].long()
+        return batch
+
 class ChatGPT2Trainer:
     """Handles loading GPT-2, training on dataset, and returning training metadata."""
     # setup components for training
@@ -154,60 +288,102 @@ class ChatGPT2Trainer:
         setup_ml_tracking_dirs(output_dir)
         
         # setup hardware device that will be used for training
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # (torchrun sets LOCAL_RANK, each process uses its own GPU)
+        self.device = torch.device(f"cuda:{int(os.environ.get('LOCAL_RANK', 0))}" if torch.cuda.is_available() else "cpu")
         # log what hardware device being used
-        print(f"🔧 Using device: {self.device}")
+        logger.info("🔧 Using device: %s", self.device)
     # function to load model and tokenizer
-    # 1. Load tokenizer and model
+    # 1. Load tokenizer and model (SDPA attention when transformers supports it)
     # 2. Add special tokens to tokenizer
     # 3. Resize model embeddings to match tokenizer
     # 4. Move model to hardware device
     def load_model(self, special_tokens):
         """Loads tokenizer and model, adds special tokens."""
-        print(f"🤖 Loading model: {self.model_name}")
-        # Load tokenizer from pretrained model
-        self.tokenizer = GPT2Tokenizer.from_pretrained(self.model_name)
+        logger.info("🤖 Loading model: %s", self.model_name)
+        # Load fast (Rust) tokenizer from pretrained model
+        self.tokenizer = GPT2TokenizerFast.from_pretrained(self.model_name)
         # add special tokens to tokenizer
         added = self.tokenizer.add_special_tokens({"additional_special_tokens": special_tokens})
         # set pad token to eos token
         self.tokenizer.pad_token = self.tokenizer.eos_token
         
-        print(f"➕ Added {added} special tokens")
+        logger.info("➕ Added %d special tokens", added)
         # load based model that will be trained (fine-tuned)
-        self.model = GPT2LMHeadModel.from_pretrained(self.model_name)
+        # attention through torch scaled_dot_product_attention (Flash / memory efficient kernels)
+        try:
+            self.model = GPT2LMHeadModel.from_pretrained(self.model_name, attn_implementation="sdpa")
+        except (TypeError, ValueError):
+            # transformers without SDPA support for GPT-2, classic attention
+            self.model = GPT2LMHeadModel.from_pretrained(self.model_name)
         # resize token embeddings to match new tokenizer size with special tokens
         self.model.resize_token_embeddings(len(self.tokenizer))
         # move model to hardware device
         self.model.to(self.device)
         
-        print(f"📊 Model loaded. Vocab size: {len(self.tokenizer)}")
+        logger.info("📊 Model loaded. Vocab size: %d", len(self.tokenizer))
     # function that runs training
-    #1. asks user confirmation before starting training
+    #1. asks user confirmation before starting training (single process runs only)
     #2. sets up data collator for language modeling
-    #3. configures training arguments
+    #3. configures training arguments (mixed precision on GPU, torch.compile when asked for)
     #4. initializes Trainer and starts training
-    def train(self, dataset, epochs=5, batch_size=1, lr=2e-5):
+    def train(self, dataset, epochs=5, batch_size=1, lr=2e-5, gradient_checkpointing=False,
+              gradient_accumulation_steps=1, compile_model=False):
         """Runs the actual GPT-2 training."""
-        print("🚀 Starting model training...")
-        print(f"📋 Training parameters: epochs={epochs}, batch_size={batch_size}, lr={lr}")
-        print(f"📊 Training on {len(dataset)} examples")
+        logger.info("🚀 Starting model training...")
+        logger.info("📋 Training parameters: epochs=%s, batch_size=%s, lr=%s, accumulation=%s",
+                    epochs, batch_size, lr, gradient_accumulation_steps)
+        logger.info("📊 Training on %d examples", len(dataset))
         
         # Ask user confirmation
-        user_input = input("\n➡️  Continue with training? (y/N): ").lower().strip()
-        if user_input != 'y':
-            print("⏸️  Training cancelled.")
-            return None
+        # under torchrun (one process per GPU) the launch itself is the confirmation,
+        # a prompt on one rank would leave the other ranks waiting
+        world_size = int(os.environ.get("WORLD_SIZE", 1))
+        if world_size == 1:
+            user_input = input("\n➡️  Continue with training? (y/N): ").lower().strip()
+            if user_input != 'y':
+                logger.info("⏸️  Training cancelled.")
+                return None
+        else:
+            logger.info("🌐 Distributed training on %d processes", world_size)
         
-        data_collator = DataCollatorForLanguageModeling(
+        data_collator = LongInputCollator(DataCollatorForLanguageModeling(
             tokenizer=self.tokenizer,
             mlm=False
-        )
+        ))
+        # mixed precision on GPU: BF16 where supported else FP16, TF32 matmuls on Ampere+
+        use_cuda = torch.cuda.is_available()
+        use_bf16 = use_cuda and torch.cuda.is_bf16_supported()
+        precision_args = {"bf16": use_bf16, "fp16": use_cuda and not use_bf16}
+        if use_cuda and torch.cuda.get_device_capability()[0] >= 8:
+            precision_args["tf32"] = True
+        logger.info("⚙️  Precision: %s", "bf16" if use_bf16 else "fp16" if use_cuda else "fp32")
+        # fused AdamW on GPU: one kernel launch per step for all parameters instead of per tensor
+        optim = "adamw_torch_fused" if use_cuda else "adamw_torch"
+        # compile model into fused kernels on GPU (Trainer compiles, saved weights stay uncompiled)
+        # opt-in: inductor needs triton, which is missing on Windows and would crash the first step
+        use_compile = compile_model and use_cuda and hasattr(torch, "compile")
+        if use_compile and importlib.util.find_spec("triton") is None:
+            logger.warning("⚠️  torch.compile skipped: triton is not installed")
+            use_compile = False
+        # collate batches in worker processes and copy them to GPU from pinned memory
+        num_workers = min(4, os.cpu_count() or 1)
+        # newer dataloader options, only passed when installed transformers knows them
+        # (requirements allow transformers 4.30, which would raise TypeError)
+        supported_args = inspect.signature(TrainingArguments).parameters
+        loader_args = {}
+        if "dataloader_persistent_workers" in supported_args:
+            loader_args["dataloader_persistent_workers"] = num_workers > 0
+        # each worker keeps batches ready ahead of the training step (only valid with workers)
+        if "dataloader_prefetch_factor" in supported_args:
+            loader_args["dataloader_prefetch_factor"] = 4 if num_workers > 0 else None
         # args for training
         args = TrainingArguments(
             output_dir=self.output_dir,
             overwrite_output_dir=True,
             num_train_epochs=epochs,
             per_device_train_batch_size=batch_size,
+            # effective batch = batch_size * gradient_accumulation_steps * processes
+            gradient_accumulation_steps=gradient_accumulation_steps,
             learning_rate=lr,
             save_steps=50,
             save_total_limit=2,
@@ -217,7 +393,20 @@ class ChatGPT2Trainer:
             prediction_loss_only=True,
             remove_unused_columns=False,
             dataloader_drop_last=False,
-            report_to=[]  # Disable all external tracking (wandb, mlflow, etc.)
+            # batch examples of similar length so the collator pads as little as possible
+            group_by_length=True,
+            dataloader_pin_memory=use_cuda,
+            dataloader_num_workers=num_workers,
+            # recompute activations in backward instead of storing them (less memory, ~30% slower)
+            gradient_checkpointing=gradient_checkpointing,
+            optim=optim,
+            torch_compile=use_compile,
+            # DDP (torchrun): every parameter gets a gradient, skip the unused parameter search
+            ddp_find_unused_parameters=False,
+            ddp_bucket_cap_mb=25,
+            report_to=[],  # Disable all external tracking (wandb, mlflow, etc.)
+            **loader_args,
+            **precision_args
         )
         # Initialize Trainer
         trainer = Trainer(
@@ -227,20 +416,23 @@ class ChatGPT2Trainer:
             train_dataset=dataset
         )
         # log training start
-        print(f"🔥 Training for {epochs} epochs on {len(dataset)} examples...")
+        logger.info("🔥 Training for %s epochs on %d examples...", epochs, len(dataset))
         # start training
         trainer.train()
 
         # inside save_path var put path and name of model
         save_path = os.path.join(self.output_dir, "final_chat_model", "trained_chat_model_1.0")
         os.makedirs(save_path, exist_ok=True)
-        # save model to save_path 
+        # save model to save_path (Trainer writes from main process only)
         trainer.save_model(save_path)
+        # with DDP only main process writes tokenizer and metadata
+        is_main_process = trainer.is_world_process_zero()
         # save tokenizer to save_path
-        self.tokenizer.save_pretrained(save_path)
+        if is_main_process:
+            self.tokenizer.save_pretrained(save_path)
         
-        print(f"✅ Model training completed!")
-        print(f"🎯 Final model saved to: {save_path}")
+        logger.info("✅ Model training completed!")
+        logger.info("🎯 Final model saved to: %s", save_path)
 
         # Return training metadata
         metadata = {
@@ -249,6 +441,8 @@ class ChatGPT2Trainer:
             "model_path": save_path,
             "epochs": epochs,
             "batch_size": batch_size,
+            "gradient_accumulation_steps": gradient_accumulation_steps,
+            "world_size": world_size,
             "learning_rate": lr,
             "device": str(self.device),
             "vocab_size": len(self.tokenizer),
@@ -258,12 +452,15 @@ class ChatGPT2Trainer:
             "special_tokens": ["<|client|>", "<|freelancer|>", "<|startoftext|>", "<|endoftext|>"]
         }
         
+        if not is_main_process:
+            return metadata
+
         # inside save_path, save metadata
         metadata_path = os.path.join(save_path, "training_metadata.json")
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, indent=2, ensure_ascii=False)
         
-        print(f"📋 Training metadata saved to: {metadata_path}")
+        logger.info("📋 Training metadata saved to: %s", metadata_path)
         
         return metadata
 
@@ -272,12 +469,12 @@ def main(json_path=None):
     special_tokens = ["<|client|>", "<|freelancer|>", "<|startoftext|>", "<|endoftext|>"]
 
     try:
-        print(f"\n🎯 Starting GPT-2 training from processed JSON data")
+        logger.info("\n🎯 Starting GPT-2 training from processed JSON data")
         if json_path:
-            print(f"📄 Using provided file: {json_path}")
+            logger.info("📄 Using provided file: %s", json_path)
 
         # Step 1: Prepare tokenizer
-        tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
+        tokenizer = GPT2TokenizerFast.from_pretrained("gpt2")
 
         # Step 2: Build dataset (auto-finds file if json_path=None)
         dataset = JSONChatDataset(tokenizer, json_path)
@@ -290,25 +487,25 @@ def main(json_path=None):
             dataset, 
             epochs=8, 
             batch_size=1, 
-            lr=2e-5
+            lr=2e-5,
+            # TRAIN_COMPILE=1 turns on torch.compile (GPU with triton only)
+            compile_model=os.environ.get("TRAIN_COMPILE") == "1"
         )
 
         if metadata:
-            print("\n🎉 Training completed successfully!")
-            print(f"🎯 Trained model available at: {metadata['model_path']}")
-            print(f"🚀 Ready to use trained model!")
+            logger.info("\n🎉 Training completed successfully!")
+            logger.info("🎯 Trained model available at: %s", metadata["model_path"])
+            logger.info("🚀 Ready to use trained model!")
             return True
         else:
-            print("\n❌ Training was cancelled or failed!")
+            logger.info("\n❌ Training was cancelled or failed!")
             return False
 
     except Exception as e:
-        print(f"❌ Training failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Training failed: %s", e)
         return False
 
 
 if __name__ == "__main__":
     success = main()
-    print(f"\n{'🎉 Training successful!' if success else '❌ Training failed!'}")
\ No newline at end of file
+    logger.info("\n%s", "🎉 Training successful!" if success else "❌ Training failed!")
\ No newline at end of file
@@ -0,0 +1,98 @@
+// Auto-scroll to bottom of chat
+const messagesContainer = document.querySelector('.messages-container');
+if (messagesContainer) {
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+}
+
+function continueWorkflow() {
+    // Trigger N8N workflow via webhook or HTTP call
+    fetch('http://localhost:5678/webhook/continue-chat-workflow', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            action: 'continue_chat_workflow',
+            timestamp: new Date().toISOString()
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        console.log('Workflow triggered:', data);
+        // Show feedback
+        const btn = document.querySelector('.continue-btn');
+        btn.textContent = '✅ Workflow Started';
+        setTimeout(() => {
+            btn.textContent = '🔄 Continue Workflow';
+        }, 2000);
+    })
+    .catch(error => {
+        console.error('Error triggering workflow:', error);
+        const btn = document.querySelector('.continue-btn');
+        btn.textContent = '❌ Error';
+        setTimeout(() => {
+            btn.textContent = '🔄 Continue Workflow';
+        }, 2000);
+    });
+}
+
+function copyResponse(text) {
+    // Copy text to clipboard
+    navigator.clipboard.writeText(text).then(() => {
+        // Show feedback
+        console.log('Response copied to clipboard');
+
+        // Create temporary notification
+        const notification = document.createElement('div');
+        notification.textContent = '✅ Copied to clipboard!';
+        notification.style.cssText = `
+            position: fixed;
+            top: 20px;
+            right: 20px;
+            background: linear-gradient(135deg, #4CAF50 0%, #45a049 100%);
+            color: white;
+            padding: 12px 20px;
+            border-radius: 25px;
+            font-weight: bold;
+            z-index: 1000;
+            box-shadow: 0 5px 15px rgba(76, 175, 80, 0.3);
+            transform: translateX(100%);
+            transition: transform 0.3s ease;
+        `;
+        document.body.appendChild(notification);
+
+        // Animate in
+        setTimeout(() => {
+            notification.style.transform = 'translateX(0)';
+        }, 10);
+
+        // Remove after 3 seconds
+        setTimeout(() => {
+            notification.style.transform = 'translateX(100%)';
+            setTimeout(() => {
+                document.body.removeChild(notification);
+            }, 300);
+        }, 3000);
+
+    }).catch(err => {
+        console.error('Failed to copy text: ', err);
+        // Fallback for older browsers
+        const textArea = document.createElement("textarea");
+        textArea.value = text;
+        document.body.appendChild(textArea);
+        textArea.select();
+        document.execCommand('copy');
+        document.body.removeChild(textArea);
+
+        // Show fallback notification
+        alert('Text copied to clipboard!');
+    });
+}
+
+// response options only carry an index into the response-data JSON payload
+document.addEventListener('click', (event) => {
+    const option = event.target.closest('[data-rid]');
+    if (!option) return;
+    const responses = JSON.parse(document.getElementById('response-data').textContent);
+    copyResponse(responses[Number(option.dataset.rid)]);
+});
@@ -6,25 +6,362 @@ import sys
 import os
 import json
 import argparse
+import gzip
+import hashlib
+import html
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+from statistics import fmean
+from string import Template
+
+# orjson parses JSON bytes in Rust and is optional, stdlib json is the fallback
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+# brotli is optional, without it only the .gz sidecar is written
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    brotli = None
 
 # Set UTF-8 encoding
 if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
 
+# file layout, resolved once at import
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
+_DB_PATH = os.path.join(_ROOT, "data", "chat_data.db")
+_TEMP_AI = os.path.join(_ROOT, "temp_ai_suggestions.json")
+_DASH_HTML = os.path.join(_HERE, "chat_dashboard.html")
+
 # Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(_ROOT)
 
 from data.chat_database_manager import ChatDatabase
 
+# page shells are parsed once at import, render only substitutes the dynamic sections
+# (string.Template $placeholders), static CSS/JS live in sibling files next to chat_dashboard.html
+# legacy dashboard page, sections: stats_html, sessions_html, ai_suggestions_html
+DASHBOARD_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Chat AI Assistant Dashboard</title>
+    <link rel="stylesheet" href="chat_dashboard_legacy.css">
+    <script src="chat_dashboard_legacy.js" defer></script>
+</head>
+<body>
+    <div class="dashboard-container">
+        <div class="header">
+            <button class="continue-button" onclick="continueWorkflow()">🔄 Continue Workflow</button>
+            <button class="refresh-button" onclick="refreshDashboard()">🔄 Refresh</button>
+            <button class="continue-workflow-button" onclick="continueWorkflow()">▶️ Continue Workflow</button>
+            <h1>🤖 Chat AI Assistant Dashboard</h1>
+            <div class="subtitle">Real-time chat monitoring with AI response suggestions</div>
+        </div>
+        
+        <div class="dashboard-content">
+            <div class="loading" id="loading">
+                <div class="spinner"></div>
+                <p>Loading dashboard data...</p>
+            </div>
+            
+            ${stats_html}
+            
+            <div class="main-grid">
+                <div class="section">
+                    <h2>📱 Active Chat Sessions</h2>
+                    ${sessions_html}
+                </div>
+                
+                <div class="section">
+                    <h2>🧠 AI Response Suggestions</h2>
+                    ${ai_suggestions_html}
+                </div>
+            </div>
+        </div>
+    </div>
+</body>
+</html>""")
+
+# enhanced dashboard page, sections: session stats numbers, chat_display, ai_suggestions_html
+ENHANCED_DASHBOARD_TEMPLATE = Template("""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>AI Chat Dashboard</title>
+    <link rel="stylesheet" href="chat_dashboard.css">
+    <script src="chat_dashboard.js" defer></script>
+</head>
+<body>
+    <div class="dashboard">
+        <div class="sidebar">
+            <h1 class="title">📱 AI Chat</h1>
+            
+            <button class="continue-btn" onclick="continueWorkflow()">🔄 Continue Workflow</button>
+            
+            <div class="stat-card">
+                <span class="stat-number">${active_sessions_count}</span>
+                <div class="stat-label">Active Chat Sessions</div>
+            </div>
+            
+            <div class="stat-card" style="background: linear-gradient(135deg, #9C27B0 0%, #7B1FA2 100%);">
+                <span class="stat-number">${total_messages}</span>
+                <div class="stat-label">Total Messages</div>
+            </div>
+            
+            <div class="stat-card" style="background: linear-gradient(135deg, #FF5722 0%, #D84315 100%);">
+                <span class="stat-number">${recent_messages}</span>
+                <div class="stat-label">Recent Messages (1h)</div>
+            </div>
+        </div>
+        
+        <div class="main-content">
+            ${chat_display}
+            ${ai_suggestions_html}
+        </div>
+    </div>
+</body>
+</html>""")
+
+# card templates of dashboard sections (str.format / format_map per row, joined once per section)
+SESSION_ITEM_HTML = """
+            <div class="session-item">
+                <div class="session-header">
+                    <div class="session-title">{title}</div>
+                    <div class="platform-badge">{platform}</div>
+                </div>
+                <div class="session-details">
+                    <strong>Participant:</strong> {participant} | 
+                    <strong>Messages:</strong> {total_messages} |
+                    <span class="timestamp">{time_ago}</span>
+                </div>
+                {preview}
+            </div>
+            """
+
+MESSAGE_PREVIEW_HTML = '<div class="message-preview">"{text}"</div>'
+
+SUGGESTION_CARD_HTML = """
+                <div class="ai-suggestion">
+                    <div class="suggestion-header">
+                        <strong>{title}</strong>
+                        <div class="confidence-badge">{confidence}</div>
+                    </div>
+                    <div class="timestamp">{time_ago}</div>
+                    <div class="response-options">
+                        {responses_html}
+                    </div>
+                </div>
+                """
+
+# style of each response mode block in all-modes suggestions:
+# mode key -> (background, border color, icon, number of options shown)
+MODE_STYLES = {
+    'template': ('#f1f8e9', '#8bc34a', '✅', 3),
+    'hybrid': ('#fff3e0', '#ff9800', '🔗', 1),
+    'pure': ('#f3e5f5', '#9c27b0', '🤖', 1),
+    'summary': ('#e1f5fe', '#03a9f4', '📝', 1),
+}
+
+MODE_BLOCK_HTML = """
+                    <div style="margin: 15px 0; padding: 15px; background: {background}; border-left: 4px solid {border}; border-radius: 8px;">
+                        <strong>{icon} {mode_name}</strong> 
+                        <span style="color: #666;">({speed})</span><br>
+                        <em style="color: #666; font-size: 0.9em;">{description}</em>
+                        <div style="margin-top: 10px;">
+                    {options_html}</div></div>"""
+
+RESPONSE_OPTION_HTML = """
+                        <div class="response-option" data-rid="{rid}">
+                            <strong>Option {number}:</strong> {text}
+                        </div>
+                        """
+
+# header of all-modes and 'both' suggestions (detected phase, where it came from, what follows)
+PHASE_INFO_HTML = """
+                <div style="margin-bottom: 15px; padding: 10px; background: #e3f2fd; border-radius: 8px;">
+                    <strong>📊 Detected Phase:</strong> {phase} 
+                    <span style="color: #666; font-size: 0.9em;">({source})</span><br>
+                    <strong>🎯 {summary_label}:</strong> {summary}
+                </div>
+                """
+
+# template or AI response block of a 'both' suggestion
+BOTH_RESPONSE_HTML = """
+                    <div style="margin: 15px 0; padding: 15px; background: {background}; border-left: 4px solid {border}; border-radius: 8px;">
+                        <strong>{title}</strong> 
+                        <span style="color: #666;">({source})</span><br>
+                        <div style="margin-top: 10px;">
+                            <div class="response-option" data-rid="{rid}">
+                                <strong>{label}:</strong> {text}
+                            </div>
+                        </div>
+                    </div>
+                    """
+
+# enhanced dashboard suggestion card (head is closed after its response options)
+ENHANCED_CARD_HEAD_HTML = """
+                    <div class="ai-suggestion-card">
+                        <div class="suggestion-info">
+                            <span class="phase-badge">Phase: {phase}</span>
+                            <span class="confidence-badge">{confidence}</span>
+                        </div>
+                """
+
+ENHANCED_RESPONSE_HTML = """
+                        <div class="response-option {kind}" data-rid="{rid}">
+                            <strong>{title}</strong>
+                            <p>{text}</p>
+                        </div>
+                    """
+
+CHAT_MESSAGE_HTML = """
+                    <div class="message {sender_class}">
+                        <div class="message-sender">{sender}</div>
+                        <div class="message-text">{text}</div>
+                        {timestamp}
+                    </div>
+            """
+
+# render cache file next to chat_dashboard.html (hash of last rendered data, survives restarts)
+RENDER_CACHE_NAME = '.chat_dashboard_cache.json'
+# templates live in this file, a changed generator must not reuse pages rendered by old code
+GENERATOR_MTIME_NS = os.stat(__file__).st_mtime_ns
+
+# split a page template into (literal text, placeholder name) chunks, done once at import
+# so a page can be written to file piece by piece instead of building one big string
+def template_chunks(template):
+    """Split string.Template into literal/placeholder chunks"""
+    text = template.template
+    chunks = []
+    literal = []
+    pos = 0
+    for match in template.pattern.finditer(text):
+        literal.append(text[pos:match.start()])
+        pos = match.end()
+        # $$ is an escaped delimiter, stays part of the literal text
+        if match.group('escaped') is not None:
+            literal.append(template.delimiter)
+            continue
+        chunks.append(("".join(literal), match.group('named') or match.group('braced')))
+        literal = []
+    literal.append(text[pos:])
+    chunks.append(("".join(literal), None))
+    return chunks
+
+# yield page pieces of template chunks filled with section values
+def stream_template(chunks, values):
+    for literal, name in chunks:
+        yield literal
+        if name is not None:
+            yield str(values[name])
+
+# JSON payload with copy texts of response options, read by page click handler
+# "<" escaped so response text can never close the script tag
+def response_data_script(responses):
+    payload = orjson.dumps(responses).decode('utf-8') if ORJSON_AVAILABLE else json.dumps(responses, ensure_ascii=False)
+    payload = payload.replace('<', '\\u003c')
+    return f'<script id="response-data" type="application/json">{payload}</script>'
+
+# escape chat/AI text for HTML once per field (quotes too, values also land in attributes)
+def escape_html(value):
+    return html.escape(str(value), quote=True)
+
+# numbered response option divs, copy texts are collected into responses (data-rid is the index)
+def render_options(texts, responses):
+    start = len(responses)
+    responses.extend(texts)
+    return "".join(
+        RESPONSE_OPTION_HTML.format(rid=start + index, number=index + 1, text=escape_html(text))
+        for index, text in enumerate(texts)
+    )
+
+# write page pieces to path plus pre-compressed sidecars (path.gz, path.br with brotli)
+# an HTTP layer can serve the sidecar as is, compression is paid once per render not per refresh
+# each piece is encoded to UTF-8 once and the same bytes go to all outputs (binary files, no text layer)
+def write_page(path, pieces):
+    compressor = brotli.Compressor(quality=5) if BROTLI_AVAILABLE else None
+    br_parts = []
+    with open(path, 'wb') as f, gzip.open(path + '.gz', 'wb', compresslevel=6) as gz:
+        for piece in pieces:
+            data = piece.encode('utf-8')
+            f.write(data)
+            gz.write(data)
+            if compressor:
+                br_parts.append(compressor.process(data))
+    if compressor:
+        br_parts.append(compressor.finish())
+        with open(path + '.br', 'wb') as f:
+            f.writelines(br_parts)
+
+# bound once, hot paths skip the datetime attribute lookup
+_datetime_now = datetime.now
+
+# time ago units, largest first (anything under a minute is "Just now")
+_UNITS = ((86400, 'days'), (3600, 'hours'), (60, 'minutes'))
+
+# time ago text per (timestamp, render time), rows sharing a timestamp are parsed once per render
+@lru_cache(maxsize=4096)
+def _fmt_time_ago(timestamp_str, now):
+    try:
+        if isinstance(timestamp_str, str):
+            # trailing Z (UTC) is dropped, wall clock time is compared naive anyway
+            ts = timestamp_str[:-1] if timestamp_str.endswith('Z') else timestamp_str
+            try:
+                timestamp = datetime.fromisoformat(ts)
+            except ValueError:
+                timestamp = datetime.strptime(ts[:19], "%Y-%m-%dT%H:%M:%S")
+        else:
+            timestamp = timestamp_str
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.replace(tzinfo=None)
+        
+        total = int((now - timestamp).total_seconds())
+        for seconds, unit in _UNITS:
+            count = total // seconds
+            if count > 0:
+                return f"{count} {unit} ago"
+        return "Just now"
+    except Exception:
+        return "Unknown"
+
+DASHBOARD_CHUNKS = template_chunks(DASHBOARD_TEMPLATE)
+ENHANCED_DASHBOARD_CHUNKS = template_chunks(ENHANCED_DASHBOARD_TEMPLATE)
+
 class ChatDashboardGenerator:
-    def __init__(self):
+    def __init__(self, dashboard_path=_DASH_HTML):
         # Use same database path as AI system
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        db_path = os.path.join(project_root, "data", "chat_data.db")
-        self.db = ChatDatabase(db_path)
+        self.db = ChatDatabase(_DB_PATH)
+        # page written by every generate_* call (resolved once, not per render)
+        self._dashboard_path = dashboard_path
+        # hash of last rendered dashboard data and its result (skip render when data is unchanged)
+        # restored from render cache file so unchanged data is not rendered again after restart
+        self._render_cache_path = os.path.join(os.path.dirname(dashboard_path), RENDER_CACHE_NAME)
+        self._last_hash, self._last_result = self._load_render_cache()
+        # (mtime_ns, size) of temp AI suggestions file at last load and what it parsed to
+        self._last_temp_stat = None
+        self._last_ai_suggestions = []
+        # time of the current generate_* call, shared by every row of one render
+        self._render_now = None
+        # legacy suggestion renderer per format
+        self._suggestion_renderers = {
+            'all-modes': self._render_all_modes_suggestion,
+            'both': self._render_both_suggestion
+        }
     
     def get_session_stats(self) -> dict:
         """Get chat session statistics for dashboard"""
@@ -106,7 +443,7 @@ class ChatDashboardGenerator:
                 'platform': session_row[1] or 'unknown',
                 'title': session_row[2] or 'Unknown Chat',
                 'participant': session_row[3] or 'Unknown',
-                'last_activity': session_row[4] or datetime.now().isoformat(),
+                'last_activity': session_row[4] or self._now().isoformat(),
                 'total_messages': session_row[5] or len(messages),
                 'url': session_row[6] or '',
                 'messages': messages
@@ -115,17 +452,115 @@ class ChatDashboardGenerator:
             print(f"[ERROR] Getting active chat content: {e}")
             return None
     
+    def _load_render_cache(self):
+        """Hash and result of the last render saved by a previous run"""
+        try:
+            with open(self._render_cache_path, 'rb') as f:
+                cache = json.loads(f.read())
+            html_stat = os.stat(cache['result']['dashboard_path'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, None
+        # page was rewritten after that render (e.g. by another generator), render again
+        if html_stat.st_mtime_ns != cache.get('html_mtime_ns'):
+            return None, None
+        return cache.get('hash'), cache['result']
+    
+    def _save_render_cache(self, dashboard_path):
+        """Save hash and result of the current page for the next run"""
+        cache = {
+            'hash': self._last_hash,
+            'result': self._last_result,
+            'html_mtime_ns': os.stat(dashboard_path).st_mtime_ns
+        }
+        try:
+            with open(self._render_cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"[WARNING] Could not save dashboard render cache: {e}")
+    
+    def load_ai_suggestions(self, now_iso=None) -> list:
+        """Load temporary AI suggestions written by the response generator"""
+        # default timestamp for suggestions written without one
+        now_iso = now_iso or self._now().isoformat()
+        ai_suggestions = []
+        try:
+            st = os.stat(_TEMP_AI)
+        except FileNotFoundError:
+            st = None
+        
+        # file not rewritten since last load (30 s refresh loop): reuse parsed suggestions
+        temp_stat = (st.st_mtime_ns, st.st_size) if st else None
+        if temp_stat is not None and temp_stat == self._last_temp_stat:
+            return self._last_ai_suggestions
+        
+        if st and st.st_size:
+            try:
+                with open(_TEMP_AI, 'rb') as f:
+                    raw = f.read()
+                    temp_suggestions = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw.decode('utf-8'))
+                    
+                    # fields shared by multi-mode and 'both' formats, looked up once
+                    if isinstance(temp_suggestions, dict):
+                        session_id = temp_suggestions.get('session_id', 'unknown')
+                        confidence = temp_suggestions.get('confidence', 0.0)
+
+                    # Check if it's multi-mode format (new)
+                    if 'all_modes' in temp_suggestions:
+                        # New format with all 4 modes
+                        print("[INFO] Loading multi-mode AI suggestions")
+                        ai_suggestions = [{
+                            'session_id': session_id,
+                            'suggestion_type': 'all-modes',
+                            'confidence': confidence,
+                            'all_modes': temp_suggestions['all_modes'],
+                            'timestamp': temp_suggestions.get('timestamp', now_iso)
+                        }]
+                    elif 'template_response' in temp_suggestions and 'ai_response' in temp_suggestions:
+                        # "Both" format with template and AI responses
+                        print("[INFO] Loading 'both' mode AI suggestions (Template + AI)")
+                        ai_suggestions = [{
+                            'session_id': session_id,
+                            'suggestion_type': 'both',
+                            'confidence': confidence,
+                            'generated_at': temp_suggestions.get('created_at', now_iso),
+                            'template_response': temp_suggestions['template_response'],
+                            'ai_response': temp_suggestions['ai_response'],
+                            'phase': temp_suggestions.get('phase', 'Unknown'),
+                            'model_used': temp_suggestions.get('model_used', 'unknown'),
+                            'used': False
+                        }]
+                    elif isinstance(temp_suggestions, list) and len(temp_suggestions) > 0:
+                        # Old format - single suggestion
+                        print("[INFO] Loading legacy AI suggestions")
+                        ai_suggestions = temp_suggestions
+                    else:
+                        print("[WARNING] Unrecognized AI suggestions format")
+
+            except Exception as e:
+                print(f"[ERROR] Loading AI suggestions: {e}")
+        
+        self._last_temp_stat = temp_stat
+        self._last_ai_suggestions = ai_suggestions
+        return ai_suggestions
+    
     def generate_dashboard(self, session_id=None):
         """Generate enhanced interactive dashboard HTML with session stats"""
         try:
-            # Get session stats
-            session_stats = self.get_session_stats()
+            # one timestamp for the whole run (suggestion defaults, time ago texts and result)
+            self._render_now = _datetime_now()
+            now_iso = self._render_now.isoformat()
             
-            # Get active chat content  
-            active_chat = self.get_active_chat_content()
-            
-            # Get existing dashboard data for AI suggestions
-            dashboard_data = self.db.get_dashboard_data()
+            # DB queries and temp AI suggestions file are independent I/O, run them concurrently
+            # (each DB method opens its own sqlite connection)
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                # Get session stats
+                stats_future = pool.submit(self.get_session_stats)
+                # Get active chat content
+                chat_future = pool.submit(self.get_active_chat_content)
+                # Load temporary AI suggestions if they exist
+                ai_suggestions = self.load_ai_suggestions(now_iso)
+                session_stats = stats_future.result()
+                active_chat = chat_future.result()
             
             print(f"[INFO] Session stats: {session_stats}")
             print(f"[INFO] Active chat: {bool(active_chat)}")
@@ -133,482 +568,106 @@ class ChatDashboardGenerator:
                 print(f"[INFO] Active chat session: {active_chat['session_id']}")
                 print(f"[INFO] Messages in active chat: {len(active_chat['messages'])}")
             
-            # Load temporary AI suggestions if they exist
-            temp_ai_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'temp_ai_suggestions.json')
-            ai_suggestions = []
-            if os.path.exists(temp_ai_file):
-                try:
-                    with open(temp_ai_file, 'r', encoding='utf-8') as f:
-                        temp_suggestions = json.load(f)
-                        
-                        # Check if it's multi-mode format (new)
-                        if 'all_modes' in temp_suggestions:
-                            # New format with all 4 modes
-                            print("[INFO] Loading multi-mode AI suggestions")
-                            ai_suggestions = [{
-                                'session_id': temp_suggestions.get('session_id', 'unknown'),
-                                'suggestion_type': 'all-modes',
-                                'confidence': temp_suggestions.get('confidence', 0.0),
-                                'all_modes': temp_suggestions['all_modes'],
-                                'timestamp': temp_suggestions.get('timestamp', datetime.now().isoformat())
-                            }]
-                        elif 'template_response' in temp_suggestions and 'ai_response' in temp_suggestions:
-                            # "Both" format with template and AI responses
-                            print("[INFO] Loading 'both' mode AI suggestions (Template + AI)")
-                            ai_suggestions = [{
-                                'session_id': temp_suggestions.get('session_id', 'unknown'),
-                                'suggestion_type': 'both',
-                                'confidence': temp_suggestions.get('confidence', 0.0),
-                                'generated_at': temp_suggestions.get('created_at', datetime.now().isoformat()),
-                                'template_response': temp_suggestions.get('template_response', ''),
-                                'ai_response': temp_suggestions.get('ai_response', ''),
-                                'phase': temp_suggestions.get('phase', 'Unknown'),
-                                'model_used': temp_suggestions.get('model_used', 'unknown'),
-                                'used': False
-                            }]
-                        elif isinstance(temp_suggestions, list) and len(temp_suggestions) > 0:
-                            # Old format - single suggestion
-                            print("[INFO] Loading legacy AI suggestions")
-                            ai_suggestions = temp_suggestions
-                        else:
-                            print("[WARNING] Unrecognized AI suggestions format")
-                            
-                except Exception as e:
-                    print(f"[ERROR] Loading AI suggestions: {e}")
-            
-            # Create enhanced dashboard data structure
+            # Create enhanced dashboard data structure (only what the page renders,
+            # everything in here is part of the render hash)
             enhanced_data = {
                 'session_stats': session_stats,
                 'active_chat': active_chat,
-                'ai_suggestions': ai_suggestions,
-                'all_sessions': dashboard_data.get('active_sessions', [])
+                'ai_suggestions': ai_suggestions
             }
+            return self._write_enhanced_dashboard(enhanced_data, now_iso)
             
-            # Generate new HTML format
-            html_content = self.create_enhanced_dashboard_html(enhanced_data)
-            
-            # Save to file
-            dashboard_path = os.path.join(os.path.dirname(__file__), 'chat_dashboard.html')
+        except Exception as e:
+            print(f"[ERROR] Enhanced dashboard generation error: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def generate_dashboards(self, session_ids):
+        """Generate one dashboard with chats of several sessions (one DB connection, one render)"""
+        try:
+            self._render_now = _datetime_now()
+            now_iso = self._render_now.isoformat()
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                stats_future = pool.submit(self.get_session_stats)
+                chats_future = pool.submit(self.db.get_dashboard_data_for, list(session_ids))
+                ai_suggestions = self.load_ai_suggestions(now_iso)
+                session_stats = stats_future.result()
+                chats = list(chats_future.result().values())
             
-            with open(dashboard_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            print(f"[INFO] Session stats: {session_stats}")
+            print(f"[INFO] Requested sessions found: {len(chats)}/{len(session_ids)}")
             
-            result = {
-                'success': True,
-                'dashboard_path': dashboard_path,
-                'active_sessions_count': session_stats['active_sessions_count'],
-                'total_messages': session_stats['total_messages'],
-                'recent_messages': session_stats['recent_messages'],
-                'active_chat_id': active_chat['session_id'] if active_chat else None,
-                'timestamp': datetime.now().isoformat()
+            # newest requested session is the active one, all chats are shown one after another
+            enhanced_data = {
+                'session_stats': session_stats,
+                'active_chat': chats[0] if chats else None,
+                'chats': chats,
+                'ai_suggestions': ai_suggestions
             }
-            
-            print(f"[SUCCESS] Enhanced dashboard generated: {dashboard_path}")
-            return result
+            return self._write_enhanced_dashboard(enhanced_data, now_iso)
             
         except Exception as e:
             print(f"[ERROR] Enhanced dashboard generation error: {e}")
             return {'success': False, 'error': str(e)}
     
-    def create_dashboard_html(self, data):
-        """Create the complete dashboard HTML"""
-        
-        sessions_html = self.generate_sessions_html(data['active_sessions'])
-        ai_suggestions_html = self.generate_ai_suggestions_html(data['recent_responses'])
-        stats_html = self.generate_stats_html(data)
-        
-        html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Chat AI Assistant Dashboard</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }}
-        
-        .dashboard-container {{
-            max-width: 1400px;
-            margin: 0 auto;
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 20px;
-            box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
-            backdrop-filter: blur(10px);
-            overflow: hidden;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-            color: white;
-            padding: 30px;
-            text-align: center;
-            position: relative;
-        }}
-        
-        .header h1 {{
-            font-size: 2.5em;
-            margin-bottom: 10px;
-            text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.2);
-        }}
-        
-        .header .subtitle {{
-            font-size: 1.2em;
-            opacity: 0.9;
-        }}
-        
-        .refresh-button {{
-            position: absolute;
-            top: 30px;
-            right: 180px;
-            background: rgba(255, 255, 255, 0.2);
-            border: 2px solid rgba(255, 255, 255, 0.3);
-            color: white;
-            padding: 10px 20px;
-            border-radius: 25px;
-            cursor: pointer;
-            font-weight: bold;
-            transition: all 0.3s ease;
-        }}
-        
-        .continue-workflow-button {{
-            position: absolute;
-            top: 30px;
-            right: 30px;
-            background: linear-gradient(135deg, #43e97b 0%, #38f9d7 100%);
-            border: none;
-            color: white;
-            padding: 12px 24px;
-            border-radius: 25px;
-            cursor: pointer;
-            font-weight: bold;
-            font-size: 1em;
-            transition: all 0.3s ease;
-            box-shadow: 0 4px 15px rgba(67, 233, 123, 0.3);
-        }}
-        
-        .continue-workflow-button:hover {{
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px rgba(67, 233, 123, 0.4);
-        }}
-        
-        .refresh-button:hover {{
-            background: rgba(255, 255, 255, 0.3);
-            transform: translateY(-2px);
-        }}
-        
-        .continue-button {{
-            position: absolute;
-            top: 30px;
-            left: 30px;
-            background: #28a745;
-            border: none;
-            color: white;
-            padding: 12px 25px;
-            border-radius: 25px;
-            cursor: pointer;
-            font-weight: bold;
-            font-size: 16px;
-            transition: all 0.3s ease;
-            box-shadow: 0 4px 15px rgba(40, 167, 69, 0.3);
-        }}
-        
-        .continue-button:hover {{
-            background: #218838;
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px rgba(40, 167, 69, 0.4);
-        }}
-        
-        .dashboard-content {{
-            padding: 30px;
-        }}
-        
-        .stats-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            margin-bottom: 30px;
-        }}
-        
-        .stat-card {{
-            background: linear-gradient(135deg, #ff9a9e 0%, #fecfef 100%);
-            padding: 25px;
-            border-radius: 15px;
-            text-align: center;
-            color: white;
-            box-shadow: 0 10px 20px rgba(0, 0, 0, 0.1);
-            transition: transform 0.3s ease;
-        }}
-        
-        .stat-card:hover {{
-            transform: translateY(-5px);
-        }}
-        
-        .stat-number {{
-            font-size: 2.5em;
-            font-weight: bold;
-            margin-bottom: 10px;
-        }}
-        
-        .stat-label {{
-            font-size: 1.1em;
-            opacity: 0.9;
-        }}
-        
-        .main-grid {{
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 30px;
-            margin-top: 30px;
-        }}
-        
-        .section {{
-            background: white;
-            border-radius: 15px;
-            padding: 25px;
-            box-shadow: 0 10px 25px rgba(0, 0, 0, 0.1);
-        }}
-        
-        .section h2 {{
-            color: #333;
-            margin-bottom: 20px;
-            font-size: 1.5em;
-            border-bottom: 3px solid #4facfe;
-            padding-bottom: 10px;
-        }}
-        
-        .session-item {{
-            background: #f8f9fa;
-            border-radius: 10px;
-            padding: 20px;
-            margin-bottom: 15px;
-            border-left: 4px solid #4facfe;
-            transition: all 0.3s ease;
-        }}
-        
-        .session-item:hover {{
-            background: #e9ecef;
-            transform: translateX(5px);
-        }}
-        
-        .session-header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 10px;
-        }}
-        
-        .session-title {{
-            font-weight: bold;
-            color: #333;
-            font-size: 1.1em;
-        }}
-        
-        .platform-badge {{
-            background: #4facfe;
-            color: white;
-            padding: 4px 12px;
-            border-radius: 15px;
-            font-size: 0.8em;
-            text-transform: uppercase;
-        }}
-        
-        .session-details {{
-            color: #666;
-            margin-bottom: 10px;
-        }}
-        
-        .message-preview {{
-            background: white;
-            padding: 10px;
-            border-radius: 8px;
-            border-left: 3px solid #28a745;
-            font-style: italic;
-            max-height: 60px;
-            overflow: hidden;
-        }}
-        
-        .ai-suggestion {{
-            background: #fff3cd;
-            border: 1px solid #ffeaa7;
-            border-radius: 10px;
-            padding: 15px;
-            margin-bottom: 15px;
-            position: relative;
-        }}
-        
-        .ai-suggestion .suggestion-header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 10px;
-        }}
-        
-        .confidence-badge {{
-            background: #28a745;
-            color: white;
-            padding: 4px 10px;
-            border-radius: 12px;
-            font-size: 0.8em;
-        }}
-        
-        .response-options {{
-            margin-top: 10px;
-        }}
-        
-        .response-option {{
-            background: white;
-            border: 1px solid #ddd;
-            border-radius: 8px;
-            padding: 12px;
-            margin-bottom: 8px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }}
-        
-        .response-option:hover {{
-            background: #f0f8ff;
-            border-color: #4facfe;
-            transform: translateX(5px);
-        }}
-        
-        .timestamp {{
-            color: #888;
-            font-size: 0.9em;
-        }}
-        
-        .empty-state {{
-            text-align: center;
-            padding: 60px 20px;
-            color: #666;
-        }}
-        
-        .empty-state h3 {{
-            font-size: 1.5em;
-            margin-bottom: 15px;
-        }}
+    def _write_enhanced_dashboard(self, enhanced_data, now_iso):
+        """Render enhanced dashboard to chat_dashboard.html unless data is unchanged since last render"""
+        session_stats = enhanced_data['session_stats']
+        active_chat = enhanced_data['active_chat']
         
-        .loading {{
-            display: none;
-            text-align: center;
-            padding: 20px;
-        }}
+        # Save to file
+        dashboard_path = self._dashboard_path
         
-        .spinner {{
-            border: 4px solid #f3f3f3;
-            border-top: 4px solid #4facfe;
-            border-radius: 50%;
-            width: 40px;
-            height: 40px;
-            animation: spin 1s linear infinite;
-            margin: 0 auto 20px;
-        }}
+        # same data as last render: page on disk is already up to date, only touch it
+        # (generator file mtime is part of the hash, changed templates always render again)
+        data_hash = hashlib.blake2b(
+            json.dumps([GENERATOR_MTIME_NS, enhanced_data], sort_keys=True, default=str).encode('utf-8'),
+            digest_size=16
+        ).hexdigest()
+        if data_hash == self._last_hash and os.path.exists(dashboard_path):
+            os.utime(dashboard_path)
+            self._save_render_cache(dashboard_path)
+            print(f"[INFO] Dashboard data unchanged, skipped render: {dashboard_path}")
+            return dict(self._last_result, cached=True, timestamp=now_iso)
         
-        @keyframes spin {{
-            0% {{ transform: rotate(0deg); }}
-            100% {{ transform: rotate(360deg); }}
-        }}
+        # Generate new HTML format, written piece by piece (full page never held as one string)
+        write_page(dashboard_path, self.stream_enhanced_dashboard_html(enhanced_data))
         
-        @media (max-width: 768px) {{
-            .main-grid {{
-                grid-template-columns: 1fr;
-            }}
-            
-            .header h1 {{
-                font-size: 2em;
-            }}
-            
-            .continue-button, .refresh-button {{
-                position: static;
-                margin: 10px;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="dashboard-container">
-        <div class="header">
-            <button class="continue-button" onclick="continueWorkflow()">🔄 Continue Workflow</button>
-            <button class="refresh-button" onclick="refreshDashboard()">🔄 Refresh</button>
-            <button class="continue-workflow-button" onclick="continueWorkflow()">▶️ Continue Workflow</button>
-            <h1>🤖 Chat AI Assistant Dashboard</h1>
-            <div class="subtitle">Real-time chat monitoring with AI response suggestions</div>
-        </div>
+        result = {
+            'success': True,
+            'dashboard_path': dashboard_path,
+            'active_sessions_count': session_stats['active_sessions_count'],
+            'total_messages': session_stats['total_messages'],
+            'recent_messages': session_stats['recent_messages'],
+            'active_chat_id': active_chat['session_id'] if active_chat else None,
+            # changes only when dashboard content changes (usable as HTTP ETag)
+            'etag': data_hash,
+            'cached': False,
+            'timestamp': now_iso
+        }
+        self._last_hash = data_hash
+        self._last_result = result
+        self._save_render_cache(dashboard_path)
         
-        <div class="dashboard-content">
-            <div class="loading" id="loading">
-                <div class="spinner"></div>
-                <p>Loading dashboard data...</p>
-            </div>
-            
-            {stats_html}
-            
-            <div class="main-grid">
-                <div class="section">
-                    <h2>📱 Active Chat Sessions</h2>
-                    {sessions_html}
-                </div>
-                
-                <div class="section">
-                    <h2>🧠 AI Response Suggestions</h2>
-                    {ai_suggestions_html}
-                </div>
-            </div>
-        </div>
-    </div>
+        print(f"[SUCCESS] Enhanced dashboard generated: {dashboard_path}")
+        return result
     
-    <script>
-        function refreshDashboard() {{
-            document.getElementById('loading').style.display = 'block';
-            setTimeout(() => {{
-                window.location.reload();
-            }}, 1000);
-        }}
-        
-        function continueWorkflow() {{
-            document.getElementById('loading').style.display = 'block';
-            
-            // Simple approach: show message and user can manually trigger
-            alert('Continue Workflow triggered! Please run the Chat AI workflow again in n8n, or execute: run_continue_chat_workflow.ps1');
-            
-            // Auto-refresh in 3 seconds to check for updates
-            setTimeout(() => {{
-                refreshDashboard();
-            }}, 3000);
-        }}
-        
-        function copyResponse(text) {{
-            navigator.clipboard.writeText(text).then(() => {{
-                alert('Response copied to clipboard!');
-            }});
-        }}
-        
-        // Auto-refresh every 30 seconds
-        setInterval(() => {{
-            if (!document.getElementById('loading').style.display || 
-                document.getElementById('loading').style.display === 'none') {{
-                refreshDashboard();
-            }}
-        }}, 30000);
-        
-        // Hide loading on page load
-        window.addEventListener('load', () => {{
-            document.getElementById('loading').style.display = 'none';
-        }});
-    </script>
-</body>
-</html>"""
+    def create_dashboard_html(self, data):
+        """Create the complete dashboard HTML"""
+        return "".join(self.stream_dashboard_html(data))
+    
+    def stream_dashboard_html(self, data):
+        """Dashboard HTML as an iterator of page pieces"""
+        # one render time for every "time ago" on the page
+        now = self._now()
+        sessions_html = self.generate_sessions_html(data['active_sessions'], now)
+        ai_suggestions_html = self.generate_ai_suggestions_html(data['recent_responses'], now)
+        stats_html = self.generate_stats_html(data)
         
-        return html
+        return stream_template(DASHBOARD_CHUNKS, {
+            'stats_html': stats_html,
+            'sessions_html': sessions_html,
+            'ai_suggestions_html': ai_suggestions_html
+        })
     
     def generate_stats_html(self, data):
         """Generate statistics HTML section"""
@@ -618,9 +677,10 @@ class ChatDashboardGenerator:
         total_suggestions = stats.get('total_ai_responses', 0)
         used_responses = stats.get('used_responses', 0)
         
+        # mean in one pass, key lookups through itemgetter stay in C
         avg_confidence = 0
         if data['recent_responses']:
-            avg_confidence = sum(s['confidence'] for s in data['recent_responses']) / len(data['recent_responses'])
+            avg_confidence = fmean(map(itemgetter('confidence'), data['recent_responses']))
         
         return f"""
         <div class="stats-grid">
@@ -643,7 +703,7 @@ class ChatDashboardGenerator:
         </div>
         """
     
-    def generate_sessions_html(self, sessions):
+    def generate_sessions_html(self, sessions, now=None):
         """Generate sessions HTML section"""
         if not sessions:
             return """
@@ -653,33 +713,28 @@ class ChatDashboardGenerator:
             </div>
             """
         
-        sessions_html = ""
-        for session in sessions[-10:]:  # Last 10 sessions
+        now = now or self._now()
+        parts = []
+        # caller passes sessions already limited (get_dashboard_data applies LIMIT in SQL)
+        for session in sessions:
             # Get latest message
-            latest_message = ""
+            preview = ""
             if session.get('messages'):
-                latest_message = session['messages'][-1]['text'][:100] + "..." if len(session['messages'][-1]['text']) > 100 else session['messages'][-1]['text']
-            
-            time_ago = self.time_ago(session.get('last_activity', datetime.now().isoformat()))
+                text = session['messages'][-1]['text']
+                preview = MESSAGE_PREVIEW_HTML.format(text=escape_html(text[:100] + "..." if len(text) > 100 else text))
             
-            sessions_html += f"""
-            <div class="session-item">
-                <div class="session-header">
-                    <div class="session-title">{session['title']}</div>
-                    <div class="platform-badge">{session['platform']}</div>
-                </div>
-                <div class="session-details">
-                    <strong>Participant:</strong> {session['participant']} | 
-                    <strong>Messages:</strong> {session['total_messages']} |
-                    <span class="timestamp">{time_ago}</span>
-                </div>
-                {f'<div class="message-preview">"{latest_message}"</div>' if latest_message else ''}
-            </div>
-            """
-        
-        return sessions_html
+            parts.append(SESSION_ITEM_HTML.format_map({
+                'title': escape_html(session['title']),
+                'platform': escape_html(session['platform']),
+                'participant': escape_html(session['participant']),
+                'total_messages': session['total_messages'],
+                'time_ago': self.time_ago(session.get('last_activity', now), now),
+                'preview': preview
+            }))
+        
+        return "".join(parts)
     
-    def generate_ai_suggestions_html(self, suggestions):
+    def generate_ai_suggestions_html(self, suggestions, now=None):
         """Generate AI suggestions HTML section"""
         if not suggestions:
             return """
@@ -689,225 +744,135 @@ class ChatDashboardGenerator:
             </div>
             """
         
-        suggestions_html = ""
-        for suggestion in suggestions[-5:]:  # Last 5 suggestions
-            time_ago = self.time_ago(suggestion['generated_at'])
-            
-            # Check if this is multi-mode format
-            if 'all_modes' in suggestion:
-                # Multi-mode format - show all 4 modes
-                all_modes = suggestion['all_modes']
-                phase = suggestion.get('phase', 'Unknown Phase')
-                detection_method = suggestion.get('detection_method', 'unknown')
-                
-                responses_html = f"""
-                <div style="margin-bottom: 15px; padding: 10px; background: #e3f2fd; border-radius: 8px;">
-                    <strong>📊 Detected Phase:</strong> {phase} 
-                    <span style="color: #666; font-size: 0.9em;">({detection_method})</span><br>
-                    <strong>🎯 Total Options:</strong> {suggestion.get('total_options', 0)} responses across 4 modes
-                </div>
-                """
-                
-                # Template mode
-                if 'template' in all_modes:
-                    mode = all_modes['template']
-                    responses_html += f"""
-                    <div style="margin: 15px 0; padding: 15px; background: #f1f8e9; border-left: 4px solid #8bc34a; border-radius: 8px;">
-                        <strong>✅ {mode['mode_name']}</strong> 
-                        <span style="color: #666;">({mode['speed']})</span><br>
-                        <em style="color: #666; font-size: 0.9em;">{mode['description']}</em>
-                        <div style="margin-top: 10px;">
-                    """
-                    for i, response in enumerate(mode['responses'][:3], 1):
-                        responses_html += f"""
-                        <div class="response-option" onclick="copyResponse('{response.replace("'", "\\'")}')">
-                            <strong>Option {i}:</strong> {response}
-                        </div>
-                        """
-                    responses_html += "</div></div>"
-                
-                # Hybrid mode
-                if 'hybrid' in all_modes:
-                    mode = all_modes['hybrid']
-                    responses_html += f"""
-                    <div style="margin: 15px 0; padding: 15px; background: #fff3e0; border-left: 4px solid #ff9800; border-radius: 8px;">
-                        <strong>🔗 {mode['mode_name']}</strong> 
-                        <span style="color: #666;">({mode['speed']})</span><br>
-                        <em style="color: #666; font-size: 0.9em;">{mode['description']}</em>
-                        <div style="margin-top: 10px;">
-                    """
-                    for i, response in enumerate(mode['responses'][:1], 1):
-                        responses_html += f"""
-                        <div class="response-option" onclick="copyResponse('{response.replace("'", "\\'")}')">
-                            <strong>Option {i}:</strong> {response}
-                        </div>
-                        """
-                    responses_html += "</div></div>"
-                
-                # Pure AI mode
-                if 'pure' in all_modes:
-                    mode = all_modes['pure']
-                    responses_html += f"""
-                    <div style="margin: 15px 0; padding: 15px; background: #f3e5f5; border-left: 4px solid #9c27b0; border-radius: 8px;">
-                        <strong>🤖 {mode['mode_name']}</strong> 
-                        <span style="color: #666;">({mode['speed']})</span><br>
-                        <em style="color: #666; font-size: 0.9em;">{mode['description']}</em>
-                        <div style="margin-top: 10px;">
-                    """
-                    for i, response in enumerate(mode['responses'][:1], 1):
-                        responses_html += f"""
-                        <div class="response-option" onclick="copyResponse('{response.replace("'", "\\'")}')">
-                            <strong>Option {i}:</strong> {response}
-                        </div>
-                        """
-                    responses_html += "</div></div>"
-                
-                # Summary mode
-                if 'summary' in all_modes:
-                    mode = all_modes['summary']
-                    responses_html += f"""
-                    <div style="margin: 15px 0; padding: 15px; background: #e1f5fe; border-left: 4px solid #03a9f4; border-radius: 8px;">
-                        <strong>📝 {mode['mode_name']}</strong> 
-                        <span style="color: #666;">({mode['speed']})</span><br>
-                        <em style="color: #666; font-size: 0.9em;">{mode['description']}</em>
-                        <div style="margin-top: 10px;">
-                    """
-                    for i, response in enumerate(mode['responses'][:1], 1):
-                        responses_html += f"""
-                        <div class="response-option" onclick="copyResponse('{response.replace("'", "\\'")}')">
-                            <strong>Option {i}:</strong> {response}
-                        </div>
-                        """
-                    responses_html += "</div></div>"
-                
-                suggestions_html += f"""
-                <div class="ai-suggestion">
-                    <div class="suggestion-header">
-                        <strong>All Response Modes</strong>
-                        <div class="confidence-badge">{suggestion['confidence']:.1%}</div>
-                    </div>
-                    <div class="timestamp">{time_ago}</div>
-                    <div class="response-options">
-                        {responses_html}
-                    </div>
-                </div>
-                """
-            elif suggestion['suggestion_type'] == 'both':
-                # New "both" format with template and AI responses
-                phase = suggestion.get('phase', 'Unknown Phase')
-                model_used = suggestion.get('model_used', 'unknown')
-                
-                responses_html = f"""
-                <div style="margin-bottom: 15px; padding: 10px; background: #e3f2fd; border-radius: 8px;">
-                    <strong>📊 Detected Phase:</strong> {phase} 
-                    <span style="color: #666; font-size: 0.9em;">({model_used})</span><br>
-                    <strong>🎯 Response Modes:</strong> Template + AI Comparison
-                </div>
-                """
-                
-                # Template response
-                template_response = suggestion.get('template_response', '')
-                if template_response:
-                    responses_html += f"""
-                    <div style="margin: 15px 0; padding: 15px; background: #f1f8e9; border-left: 4px solid #8bc34a; border-radius: 8px;">
-                        <strong>✅ Template Response</strong> 
-                        <span style="color: #666;">(Pre-written Professional)</span><br>
-                        <div style="margin-top: 10px;">
-                            <div class="response-option" onclick="copyResponse('{template_response.replace("'", "\\'")}')">
-                                <strong>Template:</strong> {template_response}
-                            </div>
-                        </div>
-                    </div>
-                    """
-                
-                # AI response
-                ai_response = suggestion.get('ai_response', '')
-                if ai_response:
-                    responses_html += f"""
-                    <div style="margin: 15px 0; padding: 15px; background: #f3e5f5; border-left: 4px solid #9c27b0; border-radius: 8px;">
-                        <strong>🤖 AI Response</strong> 
-                        <span style="color: #666;">(GPT-2 Generated)</span><br>
-                        <div style="margin-top: 10px;">
-                            <div class="response-option" onclick="copyResponse('{ai_response.replace("'", "\\'")}')">
-                                <strong>AI:</strong> {ai_response}
-                            </div>
-                        </div>
-                    </div>
-                    """
-                
-                suggestions_html += f"""
-                <div class="ai-suggestion">
-                    <div class="suggestion-header">
-                        <strong>Template + AI Responses</strong>
-                        <div class="confidence-badge">{suggestion['confidence']:.1%}</div>
-                    </div>
-                    <div class="timestamp">{time_ago}</div>
-                    <div class="response-options">
-                        {responses_html}
-                    </div>
-                </div>
-                """
-            else:
-                # Old single-mode format
-                responses_html = ""
-                for i, response in enumerate(suggestion.get('responses', [])[:3], 1):
-                    responses_html += f"""
-                    <div class="response-option" onclick="copyResponse('{response.replace("'", "\\'")}')">
-                        <strong>Option {i}:</strong> {response}
-                    </div>
-                    """
-                
-                suggestions_html += f"""
-                <div class="ai-suggestion">
-                    <div class="suggestion-header">
-                        <strong>Type: {suggestion['suggestion_type'].title()}</strong>
-                        <div class="confidence-badge">{suggestion['confidence']:.1f}</div>
-                    </div>
-                    <div class="timestamp">{time_ago}</div>
-                    <div class="response-options">
-                        {responses_html}
-                    </div>
-                </div>
-                """
-        
-        return suggestions_html
+        now = now or self._now()
+        # copy texts of all response options, written once as JSON payload
+        # (options only carry data-rid index, page click handler copies responses[rid])
+        responses = []
+        # caller passes suggestions already limited (get_dashboard_data applies LIMIT in SQL)
+        suggestions_html = "".join(self._render_suggestion(suggestion, now, responses) for suggestion in suggestions)
+        return suggestions_html + response_data_script(responses)
     
-    def time_ago(self, timestamp_str):
+    def _render_suggestion(self, suggestion, now, responses):
+        """One legacy suggestion card, its copy texts are appended to responses"""
+        time_ago = self.time_ago(suggestion['generated_at'], now)
+        # format is picked by one dict lookup (multi-mode, 'both', anything else is old single-mode)
+        kind = 'all-modes' if 'all_modes' in suggestion else suggestion['suggestion_type']
+        renderer = self._suggestion_renderers.get(kind, self._render_single_suggestion)
+        return renderer(suggestion, time_ago, responses)
+    
+    def _render_all_modes_suggestion(self, suggestion, time_ago, responses):
+        """Multi-mode format - show all 4 modes"""
+        all_modes = suggestion['all_modes']
+        phase = escape_html(suggestion.get('phase', 'Unknown Phase'))
+        detection_method = escape_html(suggestion.get('detection_method', 'unknown'))
+        
+        responses_parts = [PHASE_INFO_HTML.format_map({
+            'phase': phase,
+            'source': detection_method,
+            'summary_label': 'Total Options',
+            'summary': f"{suggestion.get('total_options', 0)} responses across 4 modes"
+        })]
+        
+        # one block per response mode, styled by MODE_STYLES
+        for key, (background, border, icon, max_options) in MODE_STYLES.items():
+            mode = all_modes.get(key)
+            if not mode:
+                continue
+            responses_parts.append(MODE_BLOCK_HTML.format(
+                background=background,
+                border=border,
+                icon=icon,
+                mode_name=escape_html(mode['mode_name']),
+                speed=escape_html(mode['speed']),
+                description=escape_html(mode['description']),
+                options_html=render_options(mode['responses'][:max_options], responses)
+            ))
+        
+        return SUGGESTION_CARD_HTML.format(
+            title="All Response Modes",
+            confidence=f"{suggestion['confidence']:.1%}",
+            time_ago=time_ago,
+            responses_html="".join(responses_parts)
+        )
+    
+    def _render_both_suggestion(self, suggestion, time_ago, responses):
+        """New "both" format with template and AI responses"""
+        phase = escape_html(suggestion.get('phase', 'Unknown Phase'))
+        model_used = escape_html(suggestion.get('model_used', 'unknown'))
+        
+        responses_parts = [PHASE_INFO_HTML.format_map({
+            'phase': phase,
+            'source': model_used,
+            'summary_label': 'Response Modes',
+            'summary': 'Template + AI Comparison'
+        })]
+        
+        # Template response
+        template_response = suggestion.get('template_response', '')
+        if template_response:
+            rid = len(responses)
+            responses.append(template_response)
+            responses_parts.append(BOTH_RESPONSE_HTML.format_map({
+                'background': '#f1f8e9',
+                'border': '#8bc34a',
+                'title': '✅ Template Response',
+                'source': 'Pre-written Professional',
+                'rid': rid,
+                'label': 'Template',
+                'text': escape_html(template_response)
+            }))
+        
+        # AI response
+        ai_response = suggestion.get('ai_response', '')
+        if ai_response:
+            rid = len(responses)
+            responses.append(ai_response)
+            responses_parts.append(BOTH_RESPONSE_HTML.format_map({
+                'background': '#f3e5f5',
+                'border': '#9c27b0',
+                'title': '🤖 AI Response',
+                'source': 'GPT-2 Generated',
+                'rid': rid,
+                'label': 'AI',
+                'text': escape_html(ai_response)
+            }))
+        
+        return SUGGESTION_CARD_HTML.format(
+            title="Template + AI Responses",
+            confidence=f"{suggestion['confidence']:.1%}",
+            time_ago=time_ago,
+            responses_html="".join(responses_parts)
+        )
+    
+    def _render_single_suggestion(self, suggestion, time_ago, responses):
+        """Old single-mode format"""
+        return SUGGESTION_CARD_HTML.format(
+            title=f"Type: {escape_html(suggestion['suggestion_type'].title())}",
+            confidence=f"{suggestion['confidence']:.1f}",
+            time_ago=time_ago,
+            responses_html=render_options(suggestion.get('responses', [])[:3], responses)
+        )
+    
+    def _now(self):
+        """Time of the current generate_* call (current time outside of one)"""
+        return self._render_now or _datetime_now()
+    
+    def time_ago(self, timestamp_str, now=None):
         """Calculate time ago string"""
-        try:
-            if isinstance(timestamp_str, str):
-                timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            else:
-                timestamp = timestamp_str
-            
-            now = datetime.now()
-            diff = now - timestamp.replace(tzinfo=None)
-            
-            if diff.days > 0:
-                return f"{diff.days} days ago"
-            elif diff.seconds > 3600:
-                hours = diff.seconds // 3600
-                return f"{hours} hours ago"
-            elif diff.seconds > 60:
-                minutes = diff.seconds // 60
-                return f"{minutes} minutes ago"
-            else:
-                return "Just now"
-        except Exception:
-            return "Unknown"
+        return _fmt_time_ago(timestamp_str, now or self._now())
     
     def generate_empty_dashboard(self):
         """Generate empty dashboard when no data"""
-        html = self.create_dashboard_html({
-            'sessions': [],
-            'ai_suggestions': []
-        })
-        
+        self._render_now = _datetime_now()
         # Save empty dashboard
-        dashboard_path = os.path.join(os.path.dirname(__file__), 'chat_dashboard.html')
+        dashboard_path = self._dashboard_path
         
-        with open(dashboard_path, 'w', encoding='utf-8') as f:
-            f.write(html)
+        write_page(dashboard_path, self.stream_dashboard_html({
+            'active_sessions': [],
+            'recent_responses': []
+        }))
+        # page on disk is no longer the last enhanced render
+        self._last_hash = self._last_result = None
         
         return {
             'success': True,
@@ -916,467 +881,33 @@ class ChatDashboardGenerator:
             'total_messages': 0,
             'ai_suggestions': 0,
             'empty': True,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self._render_now.isoformat()
         }
 
     def create_enhanced_dashboard_html(self, enhanced_data: dict) -> str:
         """Create enhanced HTML dashboard with session stats and active chat"""
+        return "".join(self.stream_enhanced_dashboard_html(enhanced_data))
+
+    def stream_enhanced_dashboard_html(self, enhanced_data: dict):
+        """Enhanced dashboard HTML as an iterator of page pieces"""
         
         session_stats = enhanced_data['session_stats']
         active_chat = enhanced_data['active_chat']
         ai_suggestions = enhanced_data.get('ai_suggestions', [])
         
-        # Generate active chat display
-        chat_display = self.generate_chat_display(active_chat)
+        # Generate active chat display (batch dashboards show every requested chat)
+        chat_display = "".join(map(self.generate_chat_display, enhanced_data.get('chats') or [active_chat]))
         
         # Generate AI suggestions HTML
         ai_suggestions_html = self.generate_enhanced_ai_suggestions_html(ai_suggestions)
         
-        html_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AI Chat Dashboard</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: #333;
-            line-height: 1.6;
-        }}
-        
-        .dashboard {{
-            display: flex;
-            min-height: 100vh;
-            max-width: 1400px;
-            margin: 0 auto;
-            gap: 20px;
-            padding: 20px;
-        }}
-        
-        .sidebar {{
-            width: 300px;
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 15px;
-            padding: 25px;
-            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.2);
-            backdrop-filter: blur(10px);
-        }}
-        
-        .main-content {{
-            flex: 1;
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 15px;
-            padding: 25px;
-            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.2);
-            backdrop-filter: blur(10px);
-            display: flex;
-            flex-direction: column;
-        }}
-        
-        .stat-card {{
-            background: linear-gradient(135deg, #4CAF50 0%, #45a049 100%);
-            color: white;
-            padding: 20px;
-            border-radius: 12px;
-            margin-bottom: 20px;
-            text-align: center;
-            box-shadow: 0 5px 15px rgba(76, 175, 80, 0.3);
-        }}
-        
-        .stat-number {{
-            font-size: 2.5rem;
-            font-weight: bold;
-            display: block;
-        }}
-        
-        .stat-label {{
-            font-size: 0.9rem;
-            opacity: 0.9;
-            margin-top: 5px;
-        }}
-        
-        .continue-btn {{
-            background: linear-gradient(135deg, #2196F3 0%, #1976D2 100%);
-            color: white;
-            padding: 15px 20px;
-            border: none;
-            border-radius: 12px;
-            cursor: pointer;
-            font-size: 1rem;
-            font-weight: bold;
-            margin-bottom: 20px;
-            width: 100%;
-            transition: transform 0.2s;
-        }}
-        
-        .continue-btn:hover {{
-            transform: translateY(-2px);
-        }}
-        
-        .chat-container {{
-            flex: 1;
-            display: flex;
-            flex-direction: column;
-            max-height: 75vh;
-        }}
-        
-        .chat-header {{
-            background: linear-gradient(135deg, #2196F3 0%, #1976D2 100%);
-            color: white;
-            padding: 15px 20px;
-            border-radius: 12px 12px 0 0;
-            margin-bottom: 0;
-        }}
-        
-        .chat-info {{
-            font-size: 0.9rem;
-            opacity: 0.9;
-            margin-top: 5px;
-        }}
-        
-        .messages-container {{
-            flex: 1;
-            overflow-y: auto;
-            padding: 20px;
-            background: #f8f9fa;
-            border-radius: 0 0 12px 12px;
-            border: 1px solid #dee2e6;
-            border-top: none;
-        }}
-        
-        .message {{
-            margin-bottom: 15px;
-            padding: 12px 16px;
-            border-radius: 18px;
-            max-width: 80%;
-            word-wrap: break-word;
-        }}
-        
-        .message.user, .message.outgoing {{
-            background: linear-gradient(135deg, #2196F3 0%, #1976D2 100%);
-            color: white;
-            margin-left: auto;
-            border-bottom-right-radius: 5px;
-        }}
-        
-        .message.client, .message.incoming {{
-            background: linear-gradient(135deg, #4CAF50 0%, #45a049 100%);
-            color: white;
-            margin-right: auto;
-            border-bottom-left-radius: 5px;
-        }}
-        
-        .message.bot {{
-            background: linear-gradient(135deg, #FF9800 0%, #F57C00 100%);
-            color: white;
-            margin-right: auto;
-            border-bottom-left-radius: 5px;
-        }}
-        
-        .message.unknown {{
-            background: linear-gradient(135deg, #9E9E9E 0%, #757575 100%);
-            color: white;
-            margin-right: auto;
-            border-bottom-left-radius: 5px;
-        }}
-        
-        .message-sender {{
-            font-size: 0.75rem;
-            font-weight: bold;
-            opacity: 0.8;
-            margin-bottom: 4px;
-        }}
-        
-        .message-text {{
-            line-height: 1.4;
-            white-space: pre-wrap;
-        }}
-        
-        .no-chat {{
-            text-align: center;
-            color: #666;
-            font-style: italic;
-            padding: 50px 20px;
-        }}
-        
-        .timestamp {{
-            font-size: 0.7rem;
-            opacity: 0.6;
-            margin-top: 5px;
-        }}
-        
-        .title {{
-            color: #2c3e50;
-            margin-bottom: 25px;
-            font-size: 1.8rem;
-            font-weight: 600;
-        }}
-        
-        ::-webkit-scrollbar {{
-            width: 6px;
-        }}
-        
-        ::-webkit-scrollbar-track {{
-            background: #f1f1f1;
-            border-radius: 3px;
-        }}
-        
-        ::-webkit-scrollbar-thumb {{
-            background: #c1c1c1;
-            border-radius: 3px;
-        }}
-        
-        ::-webkit-scrollbar-thumb:hover {{
-            background: #a8a8a8;
-        }}
-        
-        .ai-suggestions-section {{
-            margin-top: 25px;
-            padding: 25px;
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 15px;
-            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.2);
-            backdrop-filter: blur(10px);
-        }}
-        
-        .ai-suggestions-section h3 {{
-            color: #2c3e50;
-            margin-bottom: 20px;
-            font-size: 1.5rem;
-            font-weight: 600;
-            text-align: center;
-            border-bottom: 2px solid #eee;
-            padding-bottom: 15px;
-        }}
-        
-        .ai-suggestion-card {{
-            background: linear-gradient(135deg, #f8f9fa 0%, #ffffff 100%);
-            border-radius: 15px;
-            padding: 20px;
-            margin-bottom: 15px;
-            box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
-            border: 1px solid #e9ecef;
-        }}
-        
-        .suggestion-info {{
-            display: flex;
-            justify-content: center;
-            gap: 15px;
-            margin-bottom: 20px;
-        }}
-        
-        .phase-badge {{
-            background: linear-gradient(135deg, #4CAF50 0%, #45a049 100%);
-            color: white;
-            padding: 8px 16px;
-            border-radius: 20px;
-            font-size: 0.9rem;
-            font-weight: bold;
-            box-shadow: 0 3px 10px rgba(76, 175, 80, 0.3);
-        }}
-        
-        .confidence-badge {{
-            background: linear-gradient(135deg, #2196F3 0%, #1976D2 100%);
-            color: white;
-            padding: 8px 16px;
-            border-radius: 20px;
-            font-size: 0.9rem;
-            font-weight: bold;
-            box-shadow: 0 3px 10px rgba(33, 150, 243, 0.3);
-        }}
-        
-        .response-option {{
-            background: linear-gradient(135deg, #f8f9fa 0%, #ffffff 100%);
-            border: 2px solid #e9ecef;
-            border-radius: 15px;
-            padding: 20px;
-            margin: 15px 0;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            min-height: 80px;
-            display: flex;
-            flex-direction: column;
-        }}
-        
-        .response-option:hover {{
-            background: linear-gradient(135deg, #e3f2fd 0%, #f3e5f5 100%);
-            border-color: #2196F3;
-            transform: translateY(-3px);
-            box-shadow: 0 8px 25px rgba(33, 150, 243, 0.3);
-        }}
-        
-        .template-response {{
-            border-left: 6px solid #4CAF50;
-            background: linear-gradient(135deg, #e8f5e8 0%, #f1f8e9 100%);
-        }}
-        
-        .template-response:hover {{
-            background: linear-gradient(135deg, #c8e6c9 0%, #dcedc8 100%);
-            border-color: #4CAF50;
-            box-shadow: 0 8px 25px rgba(76, 175, 80, 0.3);
-        }}
-        
-        .ai-response {{
-            border-left: 6px solid #FF9800;
-            background: linear-gradient(135deg, #fff3e0 0%, #ffecb3 100%);
-        }}
-        
-        .ai-response:hover {{
-            background: linear-gradient(135deg, #ffe0b2 0%, #ffcc02 100%);
-            border-color: #FF9800;
-            box-shadow: 0 8px 25px rgba(255, 152, 0, 0.3);
-        }}
-        
-        .response-option strong {{
-            display: block;
-            margin-bottom: 10px;
-            color: #2c3e50;
-            font-size: 1.1rem;
-        }}
-        
-        .response-option p {{
-            margin: 0;
-            color: #555;
-            font-size: 1rem;
-            line-height: 1.5;
-            flex-grow: 1;
-        }}
-    </style>
-</head>
-<body>
-    <div class="dashboard">
-        <div class="sidebar">
-            <h1 class="title">📱 AI Chat</h1>
-            
-            <button class="continue-btn" onclick="continueWorkflow()">🔄 Continue Workflow</button>
-            
-            <div class="stat-card">
-                <span class="stat-number">{session_stats['active_sessions_count']}</span>
-                <div class="stat-label">Active Chat Sessions</div>
-            </div>
-            
-            <div class="stat-card" style="background: linear-gradient(135deg, #9C27B0 0%, #7B1FA2 100%);">
-                <span class="stat-number">{session_stats['total_messages']}</span>
-                <div class="stat-label">Total Messages</div>
-            </div>
-            
-            <div class="stat-card" style="background: linear-gradient(135deg, #FF5722 0%, #D84315 100%);">
-                <span class="stat-number">{session_stats['recent_messages']}</span>
-                <div class="stat-label">Recent Messages (1h)</div>
-            </div>
-        </div>
-        
-        <div class="main-content">
-            {chat_display}
-            {ai_suggestions_html}
-        </div>
-    </div>
-    
-    <script>
-        // Auto-scroll to bottom of chat
-        const messagesContainer = document.querySelector('.messages-container');
-        if (messagesContainer) {{
-            messagesContainer.scrollTop = messagesContainer.scrollHeight;
-        }}
-        
-        function continueWorkflow() {{
-            // Trigger N8N workflow via webhook or HTTP call
-            fetch('http://localhost:5678/webhook/continue-chat-workflow', {{
-                method: 'POST',
-                headers: {{
-                    'Content-Type': 'application/json'
-                }},
-                body: JSON.stringify({{
-                    action: 'continue_chat_workflow',
-                    timestamp: new Date().toISOString()
-                }})
-            }})
-            .then(response => response.json())
-            .then(data => {{
-                console.log('Workflow triggered:', data);
-                // Show feedback
-                const btn = document.querySelector('.continue-btn');
-                btn.textContent = '✅ Workflow Started';
-                setTimeout(() => {{
-                    btn.textContent = '🔄 Continue Workflow';
-                }}, 2000);
-            }})
-            .catch(error => {{
-                console.error('Error triggering workflow:', error);
-                const btn = document.querySelector('.continue-btn');
-                btn.textContent = '❌ Error';
-                setTimeout(() => {{
-                    btn.textContent = '🔄 Continue Workflow';
-                }}, 2000);
-            }});
-        }}
-        
-        function copyResponse(text) {{
-            // Copy text to clipboard
-            navigator.clipboard.writeText(text).then(() => {{
-                // Show feedback
-                console.log('Response copied to clipboard');
-                
-                // Create temporary notification
-                const notification = document.createElement('div');
-                notification.textContent = '✅ Copied to clipboard!';
-                notification.style.cssText = `
-                    position: fixed;
-                    top: 20px;
-                    right: 20px;
-                    background: linear-gradient(135deg, #4CAF50 0%, #45a049 100%);
-                    color: white;
-                    padding: 12px 20px;
-                    border-radius: 25px;
-                    font-weight: bold;
-                    z-index: 1000;
-                    box-shadow: 0 5px 15px rgba(76, 175, 80, 0.3);
-                    transform: translateX(100%);
-                    transition: transform 0.3s ease;
-                `;
-                document.body.appendChild(notification);
-                
-                // Animate in
-                setTimeout(() => {{
-                    notification.style.transform = 'translateX(0)';
-                }}, 10);
-                
-                // Remove after 3 seconds
-                setTimeout(() => {{
-                    notification.style.transform = 'translateX(100%)';
-                    setTimeout(() => {{
-                        document.body.removeChild(notification);
-                    }}, 300);
-                }}, 3000);
-                
-            }}).catch(err => {{
-                console.error('Failed to copy text: ', err);
-                // Fallback for older browsers
-                const textArea = document.createElement("textarea");
-                textArea.value = text;
-                document.body.appendChild(textArea);
-                textArea.select();
-                document.execCommand('copy');
-                document.body.removeChild(textArea);
-                
-                // Show fallback notification
-                alert('Text copied to clipboard!');
-            }});
-        }}
-    </script>
-</body>
-</html>"""
-        
-        return html_content
+        return stream_template(ENHANCED_DASHBOARD_CHUNKS, {
+            'active_sessions_count': session_stats['active_sessions_count'],
+            'total_messages': session_stats['total_messages'],
+            'recent_messages': session_stats['recent_messages'],
+            'chat_display': chat_display,
+            'ai_suggestions_html': ai_suggestions_html
+        })
 
     def generate_enhanced_ai_suggestions_html(self, suggestions):
         """Generate AI suggestions HTML for enhanced dashboard"""
@@ -1388,52 +919,57 @@ class ChatDashboardGenerator:
                 </div>
             """
         
-        suggestions_html = """
+        # copy texts of all response options, written once as JSON payload
+        # (options only carry data-rid index, page click handler copies responses[rid])
+        responses = []
+        parts = ["""
             <div class="ai-suggestions-section">
                 <h3>🤖 AI Suggestions</h3>
-        """
+        """]
         
         for suggestion in suggestions:
             if suggestion.get('suggestion_type') == 'both':
                 # Both format with template and AI responses
                 template_response = suggestion.get('template_response', '')
                 ai_response = suggestion.get('ai_response', '')
-                phase = suggestion.get('phase', 'Unknown')
+                phase = escape_html(suggestion.get('phase', 'Unknown'))
                 confidence = suggestion.get('confidence', 0.0)
                 
-                suggestions_html += f"""
-                    <div class="ai-suggestion-card">
-                        <div class="suggestion-info">
-                            <span class="phase-badge">Phase: {phase}</span>
-                            <span class="confidence-badge">{confidence*100:.1f}%</span>
-                        </div>
-                """
+                parts.append(ENHANCED_CARD_HEAD_HTML.format_map({
+                    'phase': phase,
+                    'confidence': f"{confidence*100:.1f}%"
+                }))
                 
                 if template_response:
-                    suggestions_html += f"""
-                        <div class="response-option template-response" onclick="copyResponse('{template_response.replace("'", "\\'")}')">
-                            <strong>📝 Template Response</strong>
-                            <p>{template_response}</p>
-                        </div>
-                    """
+                    rid = len(responses)
+                    responses.append(template_response)
+                    parts.append(ENHANCED_RESPONSE_HTML.format_map({
+                        'kind': 'template-response',
+                        'rid': rid,
+                        'title': '📝 Template Response',
+                        'text': escape_html(template_response)
+                    }))
                 
                 if ai_response:
-                    suggestions_html += f"""
-                        <div class="response-option ai-response" onclick="copyResponse('{ai_response.replace("'", "\\'")}')">
-                            <strong>🤖 AI Generated Response</strong>
-                            <p>{ai_response}</p>
-                        </div>
-                    """
+                    rid = len(responses)
+                    responses.append(ai_response)
+                    parts.append(ENHANCED_RESPONSE_HTML.format_map({
+                        'kind': 'ai-response',
+                        'rid': rid,
+                        'title': '🤖 AI Generated Response',
+                        'text': escape_html(ai_response)
+                    }))
                 
-                suggestions_html += """
+                parts.append("""
                     </div>
-                """
+                """)
             
-        suggestions_html += """
+        parts.append("""
             </div>
-        """
+        """)
+        parts.append(response_data_script(responses))
         
-        return suggestions_html
+        return "".join(parts)
 
     def generate_chat_display(self, active_chat):
         """Generate HTML for active chat display"""
@@ -1445,22 +981,22 @@ class ChatDashboardGenerator:
                 </div>
             """
         
-        chat_html = f"""
+        parts = [f"""
             <div class="chat-container">
                 <div class="chat-header">
-                    <h2>{active_chat['title']}</h2>
+                    <h2>{escape_html(active_chat['title'])}</h2>
                     <div class="chat-info">
-                        {active_chat['platform'].title()} • {active_chat['participant']} • 
+                        {escape_html(active_chat['platform'].title())} • {escape_html(active_chat['participant'])} • 
                         {active_chat['total_messages']} messages
                     </div>
                 </div>
                 
                 <div class="messages-container">
-        """
+        """]
         
         for message in active_chat['messages']:
-            sender_class = message['sender_type']
-            sender_display = message['sender']
+            sender_class = escape_html(message['sender_type'])
+            sender_display = escape_html(message['sender'])
             
             # Format timestamp
             try:
@@ -1471,34 +1007,47 @@ class ChatDashboardGenerator:
             except:
                 timestamp = ''
             
-            chat_html += f"""
-                    <div class="message {sender_class}">
-                        <div class="message-sender">{sender_display}</div>
-                        <div class="message-text">{message['text']}</div>
-                        {f'<div class="timestamp">{timestamp}</div>' if timestamp else ''}
-                    </div>
-            """
-        
-        chat_html += """
+            parts.append(CHAT_MESSAGE_HTML.format_map({
+                'sender_class': sender_class,
+                'sender': sender_display,
+                'text': escape_html(message['text']),
+                'timestamp': f'<div class="timestamp">{timestamp}</div>' if timestamp else ''
+            }))
+        
+        parts.append("""
                 </div>
             </div>
-        """
+        """)
         
-        return chat_html
+        return "".join(parts)
+
+def write_result(result):
+    """Write result dict to stdout as indented JSON (orjson bytes straight to the buffer when installed)"""
+    if ORJSON_AVAILABLE:
+        # earlier print() output is still in the text layer, keep it in front of the result
+        sys.stdout.flush()
+        sys.stdout.buffer.write(orjson.dumps(result, option=orjson.OPT_INDENT_2) + b"\n")
+        sys.stdout.buffer.flush()
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
 
 def main():
     """Main dashboard generation function"""
     parser = argparse.ArgumentParser(description='Chat Dashboard Generator')
-    parser.add_argument('--session-id', help='Specific session ID to focus on')
+    parser.add_argument('--session-id', action='append',
+                        help='Session ID to show (repeat to render several sessions in one dashboard)')
     
     args = parser.parse_args()
     
     try:
         generator = ChatDashboardGenerator()
-        result = generator.generate_dashboard(session_id=args.session_id)
+        if args.session_id:
+            result = generator.generate_dashboards(args.session_id)
+        else:
+            result = generator.generate_dashboard()
         
         # Print result for n8n
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        write_result(result)
         
         return result.get('success', False)
         
@@ -1506,9 +1055,9 @@ def main():
         result = {
             'success': False,
             'error': str(e),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _datetime_now().isoformat()
         }
-        print(json.dumps(result))
+        write_result(result)
         return False
 
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+function refreshDashboard() {
+    document.getElementById('loading').style.display = 'block';
+    setTimeout(() => {
+        window.location.reload();
+    }, 1000);
+}
+
+function continueWorkflow() {
+    document.getElementById('loading').style.display = 'block';
+
+    // Simple approach: show message and user can manually trigger
+    alert('Continue Workflow triggered! Please run the Chat AI workflow again in n8n, or execute: run_continue_chat_workflow.ps1');
+
+    // Auto-refresh in 3 seconds to check for updates
+    setTimeout(() => {
+        refreshDashboard();
+    }, 3000);
+}
+
+function copyResponse(text) {
+    navigator.clipboard.writeText(text).then(() => {
+        alert('Response copied to clipboard!');
+    });
+}
+
+// response options only carry an index into the response-data JSON payload
+document.addEventListener('click', (event) => {
+    const option = event.target.closest('[data-rid]');
+    if (!option) return;
+    const responses = JSON.parse(document.getElementById('response-data').textContent);
+    copyResponse(responses[Number(option.dataset.rid)]);
+});
+
+// Auto-refresh every 30 seconds
+setInterval(() => {
+    if (!document.getElementById('loading').style.display || 
+        document.getElementById('loading').style.display === 'none') {
+        refreshDashboard();
+    }
+}, 30000);
+
+// Hide loading on page load
+window.addEventListener('load', () => {
+    document.getElementById('loading').style.display = 'none';
+});
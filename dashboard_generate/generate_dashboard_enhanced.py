@@ -21,6 +21,11 @@ except ImportError:
     print("Cannot import database_manager from data/ directory")
     sys.exit(1)
 
+# escapes for onclick="openCoverLetterModal(...)" arguments, applied in one pass per string
+# (quotes become HTML entities, cover letter newlines become literal \n for the modal)
+QUOTE_ESCAPE = str.maketrans({"'": "&#39;", '"': '&quot;'})
+COVER_LETTER_ESCAPE = str.maketrans({"'": "&#39;", '"': '&quot;', '\n': '\\n'})
+
 def cleanup_old_dashboards(output_path):
     """Remove old dashboard files before creating new one"""
     try:
@@ -726,8 +731,8 @@ def generate_html_dashboard(output_path="dashboard.html"):
                 # Add cover letter badge
                 if job.get('has_cover_letter'):
                     ai_provider = job.get('ai_provider', 'AI')
-                    cover_letter_text = job.get('cover_letter_text', '').replace("'", "&#39;").replace('"', '&quot;').replace('\n', '\\n')
-                    job_title_escaped = job_title.replace("'", "&#39;").replace('"', '&quot;')
+                    cover_letter_text = job.get('cover_letter_text', '').translate(COVER_LETTER_ESCAPE)
+                    job_title_escaped = job_title.translate(QUOTE_ESCAPE)
                     html_content += f"""
                         <a href="#" class="cover-letter-badge" onclick="openCoverLetterModal('{job_title_escaped}', '{ai_provider}', `{cover_letter_text}`)">
                             <span class="icon">📄</span> View Cover Letter
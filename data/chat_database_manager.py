@@ -6,16 +6,31 @@ import sqlite3
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
+
+# build model context string from messages returned by get_recent_messages
+# shared by response generator and phase detector so both see the same input
+def build_context(messages: List[Dict]) -> str:
+    """Join messages into 'sender_type: text' lines"""
+    return "\n".join([f"{m['sender_type']}: {m['text']}" for m in messages])
 
 class ChatDatabase:
     def __init__(self, db_path: str = "chat_data.db"):
         self.db_path = db_path
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open connection (WAL db: fsync only at checkpoints is safe)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
     def init_database(self):
         """Initialize chat database with tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
+        # WAL lets dashboard reads run next to writes and makes commits cheaper
+        # (persistent setting, stored in the database file)
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
         
         # Chat sessions table
@@ -34,10 +49,16 @@ class ChatDatabase:
                 phase TEXT,
                 phase_confidence REAL,
                 phase_updated_at DATETIME,
+                messages_hash TEXT,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # databases created before messages_hash existed get the column added
+        session_columns = [col[1] for col in cursor.execute("PRAGMA table_info(chat_sessions)").fetchall()]
+        if 'messages_hash' not in session_columns:
+            cursor.execute("ALTER TABLE chat_sessions ADD COLUMN messages_hash TEXT")
+        
         # Chat messages table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS chat_messages (
@@ -89,7 +110,7 @@ class ChatDatabase:
     
     def save_raw_chat_html(self, session_id: str, html_content: str, page_url: str) -> int:
         """Save raw chat HTML"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -105,7 +126,7 @@ class ChatDatabase:
     
     def save_chat_session(self, session_data: Dict) -> str:
         """Save or update chat session"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -132,7 +153,7 @@ class ChatDatabase:
     
     def save_chat_messages(self, session_id: str, messages: List[Dict]) -> int:
         """Save chat messages"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         saved_count = 0
@@ -165,7 +186,7 @@ class ChatDatabase:
     
     def get_latest_messages(self, session_id: str, limit: int = 10) -> List[Dict]:
         """Get latest messages from chat"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -191,7 +212,7 @@ class ChatDatabase:
     
     def get_latest_session(self) -> Optional[Dict]:
         """Get most recent active session"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -220,7 +241,7 @@ class ChatDatabase:
     
     def get_recent_messages(self, session_id: str, limit: int = 10) -> List[Dict]:
         """Get recent messages for a session"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -245,9 +266,100 @@ class ChatDatabase:
         
         return list(reversed(messages))  # Return in chronological order
     
+    def get_recent_messages_bulk(self, session_ids: List[str], limit: int = 10) -> Dict[str, List[Dict]]:
+        """Get recent messages for several sessions in one query"""
+        if not session_ids:
+            return {}
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        # rank messages per session newest first and keep top `limit` of each
+        placeholders = ",".join("?" * len(session_ids))
+        cursor.execute(f'''
+            SELECT session_id, message_text, sender, timestamp, sender_type
+            FROM (
+                SELECT session_id, message_text, sender, timestamp, sender_type,
+                       ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY timestamp DESC) AS rn
+                FROM chat_messages
+                WHERE session_id IN ({placeholders})
+            )
+            WHERE rn <= ?
+            ORDER BY session_id, timestamp ASC
+        ''', (*session_ids, limit))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        messages = {session_id: [] for session_id in session_ids}
+        for row in rows:
+            messages[row[0]].append({
+                'text': row[1],
+                'sender': row[2],
+                'timestamp': row[3],
+                'sender_type': row[4]
+            })
+        
+        return messages  # Each list in chronological order
+    
+    def get_dashboard_data_for(self, session_ids: List[str], limit: int = 100) -> Dict[str, Dict]:
+        """Get several sessions with their first `limit` messages over one connection (newest session first)"""
+        if not session_ids:
+            return {}
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        placeholders = ",".join("?" * len(session_ids))
+        cursor.execute(f'''
+            SELECT session_id, chat_platform, chat_title, participant_name,
+                   last_activity, total_messages, chat_url
+            FROM chat_sessions
+            WHERE session_id IN ({placeholders})
+            ORDER BY last_activity DESC, created_at DESC
+        ''', session_ids)
+        session_rows = cursor.fetchall()
+        
+        # number messages per session in chat order and keep first `limit` of each
+        cursor.execute(f'''
+            SELECT session_id, sender, sender_type, message_text, timestamp, message_order
+            FROM (
+                SELECT session_id, sender, sender_type, message_text, timestamp, message_order,
+                       ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY message_order ASC) AS rn
+                FROM chat_messages
+                WHERE session_id IN ({placeholders})
+            )
+            WHERE rn <= ?
+            ORDER BY session_id, message_order ASC
+        ''', (*session_ids, limit))
+        message_rows = cursor.fetchall()
+        conn.close()
+        
+        messages = {row[0]: [] for row in session_rows}
+        for row in message_rows:
+            messages.setdefault(row[0], []).append({
+                'sender': row[1],
+                'sender_type': row[2],
+                'text': row[3],
+                'timestamp': row[4],
+                'order': row[5]
+            })
+        
+        return {
+            row[0]: {
+                'session_id': row[0],
+                'platform': row[1] or 'unknown',
+                'title': row[2] or 'Unknown Chat',
+                'participant': row[3] or 'Unknown',
+                'last_activity': row[4] or datetime.now().isoformat(),
+                'total_messages': row[5] or len(messages[row[0]]),
+                'url': row[6] or '',
+                'messages': messages[row[0]]
+            }
+            for row in session_rows
+        }
+    
     def save_gpt2_response(self, session_id: str, response_data: Dict) -> int:
         """Save GPT-2 generated response"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -270,9 +382,9 @@ class ChatDatabase:
         
         return response_id
     
-    def get_dashboard_data(self) -> Dict:
-        """Get data for chat dashboard"""
-        conn = sqlite3.connect(self.db_path)
+    def get_dashboard_data(self, session_limit: int = 5, suggestion_limit: int = 10) -> Dict:
+        """Get data for chat dashboard (newest sessions and GPT-2 responses first)"""
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Active sessions
@@ -286,8 +398,8 @@ class ChatDatabase:
             WHERE cs.status = 'active'
             GROUP BY cs.session_id
             ORDER BY cs.last_activity DESC
-            LIMIT 5
-        ''')
+            LIMIT ?
+        ''', (session_limit,))
         
         active_sessions = [
             {
@@ -308,8 +420,8 @@ class ChatDatabase:
                    confidence_score, model_version, generated_at, used
             FROM gpt2_responses
             ORDER BY generated_at DESC
-            LIMIT 10
-        ''')
+            LIMIT ?
+        ''', (suggestion_limit,))
         
         recent_responses = [
             {
@@ -350,17 +462,18 @@ class ChatDatabase:
             }
         }
     
-    def update_session_phase(self, session_id: str, phase: str, confidence: float) -> bool:
-        """Update session with detected phase"""
+    def update_session_phase(self, session_id: str, phase: str, confidence: float,
+                             messages_hash: Optional[str] = None) -> bool:
+        """Update session with detected phase (and hash of the messages it was detected from)"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute('''
                 UPDATE chat_sessions 
-                SET phase = ?, phase_confidence = ?, phase_updated_at = ?
+                SET phase = ?, phase_confidence = ?, phase_updated_at = ?, messages_hash = ?
                 WHERE session_id = ?
-            ''', (phase, confidence, datetime.now(), session_id))
+            ''', (phase, confidence, datetime.now(), messages_hash, session_id))
             
             rows_affected = cursor.rowcount
             conn.commit()
@@ -377,14 +490,46 @@ class ChatDatabase:
             print(f"[DB ERROR] Failed to update phase: {e}")
             return False
     
+    def update_session_phases(self, rows: List[tuple]) -> Set[str]:
+        """Update many sessions with detected phases in one transaction
+        
+        rows: (session_id, phase, confidence, messages_hash) tuples
+        returns session ids that were actually updated (missing sessions are left out)
+        """
+        if not rows:
+            return set()
+        try:
+            conn = self._connect()
+            now = datetime.now()
+            updated = set()
+            with conn:
+                # one statement per row (same transaction) so rowcount tells which ids exist
+                for session_id, phase, confidence, messages_hash in rows:
+                    cursor = conn.execute('''
+                        UPDATE chat_sessions 
+                        SET phase = ?, phase_confidence = ?, phase_updated_at = ?, messages_hash = ?
+                        WHERE session_id = ?
+                    ''', (phase, confidence, now, messages_hash, session_id))
+                    if cursor.rowcount > 0:
+                        updated.add(session_id)
+            conn.close()
+            
+            print(f"[DB] Updated {len(updated)}/{len(rows)} sessions with detected phases")
+            return updated
+            
+        except Exception as e:
+            print(f"[DB ERROR] Failed to update phases: {e}")
+            return set()
+    
     def get_session_with_phase(self, session_id: str) -> Optional[Dict]:
         """Get session including detected phase"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
             SELECT session_id, chat_platform, chat_title, participant_name,
-                   last_activity, total_messages, phase, phase_confidence, phase_updated_at
+                   last_activity, total_messages, phase, phase_confidence, phase_updated_at,
+                   messages_hash
             FROM chat_sessions 
             WHERE session_id = ?
         ''', (session_id,))
@@ -402,15 +547,94 @@ class ChatDatabase:
                 'total_messages': row[5],
                 'phase': row[6],
                 'phase_confidence': row[7],
-                'phase_updated_at': row[8]
+                'phase_updated_at': row[8],
+                'messages_hash': row[9]
             }
         return None
 
+    def get_session_phases(self, session_ids: List[str]) -> Dict[str, Dict]:
+        """Get stored phase, confidence and messages hash for several sessions"""
+        if not session_ids:
+            return {}
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        placeholders = ",".join("?" * len(session_ids))
+        cursor.execute(f'''
+            SELECT session_id, phase, phase_confidence, messages_hash
+            FROM chat_sessions
+            WHERE session_id IN ({placeholders})
+        ''', session_ids)
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return {
+            row[0]: {'phase': row[1], 'phase_confidence': row[2], 'messages_hash': row[3]}
+            for row in rows
+        }
+
+    def get_session_with_messages(self, session_id: Optional[str] = None, limit: int = 10) -> Optional[Dict]:
+        """Get session with phase and its recent messages in one query (None = latest active)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        # pick requested (or latest active) session, then join its last `limit` messages
+        cursor.execute('''
+            WITH target AS (
+                SELECT session_id, chat_platform, chat_title, participant_name,
+                       last_activity, total_messages, phase, phase_confidence, phase_updated_at
+                FROM chat_sessions
+                WHERE (? IS NULL AND status = 'active') OR session_id = ?
+                ORDER BY last_activity DESC
+                LIMIT 1
+            ), recent AS (
+                SELECT message_text, sender, timestamp, sender_type
+                FROM chat_messages
+                WHERE session_id = (SELECT session_id FROM target)
+                ORDER BY timestamp DESC
+                LIMIT ?
+            )
+            SELECT t.session_id, t.chat_platform, t.chat_title, t.participant_name,
+                   t.last_activity, t.total_messages, t.phase, t.phase_confidence, t.phase_updated_at,
+                   r.message_text, r.sender, r.timestamp, r.sender_type, r.timestamp IS NOT NULL
+            FROM target t LEFT JOIN recent r
+            ORDER BY r.timestamp ASC
+        ''', (session_id, session_id, limit))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        if not rows:
+            return None
+        
+        row = rows[0]
+        return {
+            'session_id': row[0],
+            'platform': row[1],
+            'title': row[2],
+            'participant': row[3],
+            'last_activity': row[4],
+            'total_messages': row[5],
+            'phase': row[6],
+            'phase_confidence': row[7],
+            'phase_updated_at': row[8],
+            'messages': [
+                {
+                    'text': r[9],
+                    'sender': r[10],
+                    'timestamp': r[11],
+                    'sender_type': r[12]
+                }
+                for r in rows if r[13]
+            ]  # chronological order
+        }
+
     # ======================== 🧹 CHAT CLEANUP FUNCTIONS ========================
     
     def find_duplicate_chat_sessions(self) -> List[Dict]:
         """Find duplicate chat sessions by platform, title, and participant"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -508,7 +732,7 @@ class ChatDatabase:
 
     def merge_chat_sessions(self, keep_session_id: str, remove_session_ids: List[str]) -> Dict:
         """Merge multiple chat sessions into one, keeping all unique messages"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         stats = {
@@ -624,7 +848,7 @@ class ChatDatabase:
 
     def get_duplicate_chat_stats(self) -> Dict:
         """Get statistics about duplicate chat sessions without removing them"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Count total sessions
@@ -671,7 +895,7 @@ class ChatDatabase:
 
     def get_chat_sessions_count(self) -> int:
         """Get total count of chat sessions in database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('SELECT COUNT(*) FROM chat_sessions')
         count = cursor.fetchone()[0]
@@ -6,6 +6,7 @@ import sys
 import os
 import json
 import argparse
+import html
 from datetime import datetime
 
 # Set UTF-8 encoding
@@ -17,6 +18,11 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from data.chat_database_manager import ChatDatabase
 
+# response text as JS string literal inside an onclick="..." attribute
+# (json.dumps escapes quotes, backslashes and newlines for JS, html.escape makes it attribute safe)
+def js_arg(text):
+    return html.escape(json.dumps(text), quote=True)
+
 class ChatDashboardGenerator:
     def __init__(self):
         # Use same database path as AI system
@@ -630,8 +636,8 @@ class ChatDashboardGenerator:
                     """
                     for i, response in enumerate(mode['responses'][:3], 1):
                         responses_html += f"""
-                        <div class="response-option" onclick="copyResponse('{response.replace("'", "\\'")}')">
-                            <strong>Option {i}:</strong> {response}
+                        <div class="response-option" onclick="copyResponse({js_arg(response)})">
+                            <strong>Option {i}:</strong> {html.escape(response)}
                         </div>
                         """
                     responses_html += "</div></div>"
@@ -648,8 +654,8 @@ class ChatDashboardGenerator:
                     """
                     for i, response in enumerate(mode['responses'][:1], 1):
                         responses_html += f"""
-                        <div class="response-option" onclick="copyResponse('{response.replace("'", "\\'")}')">
-                            <strong>Option {i}:</strong> {response}
+                        <div class="response-option" onclick="copyResponse({js_arg(response)})">
+                            <strong>Option {i}:</strong> {html.escape(response)}
                         </div>
                         """
                     responses_html += "</div></div>"
@@ -666,8 +672,8 @@ class ChatDashboardGenerator:
                     """
                     for i, response in enumerate(mode['responses'][:1], 1):
                         responses_html += f"""
-                        <div class="response-option" onclick="copyResponse('{response.replace("'", "\\'")}')">
-                            <strong>Option {i}:</strong> {response}
+                        <div class="response-option" onclick="copyResponse({js_arg(response)})">
+                            <strong>Option {i}:</strong> {html.escape(response)}
                         </div>
                         """
                     responses_html += "</div></div>"
@@ -684,8 +690,8 @@ class ChatDashboardGenerator:
                     """
                     for i, response in enumerate(mode['responses'][:1], 1):
                         responses_html += f"""
-                        <div class="response-option" onclick="copyResponse('{response.replace("'", "\\'")}')">
-                            <strong>Option {i}:</strong> {response}
+                        <div class="response-option" onclick="copyResponse({js_arg(response)})">
+                            <strong>Option {i}:</strong> {html.escape(response)}
                         </div>
                         """
                     responses_html += "</div></div>"
@@ -723,8 +729,8 @@ class ChatDashboardGenerator:
                         <strong>✅ Template Response</strong> 
                         <span style="color: #666;">(Pre-written Professional)</span><br>
                         <div style="margin-top: 10px;">
-                            <div class="response-option" onclick="copyResponse('{template_response.replace("'", "\\'")}')">
-                                <strong>Template:</strong> {template_response}
+                            <div class="response-option" onclick="copyResponse({js_arg(template_response)})">
+                                <strong>Template:</strong> {html.escape(template_response)}
                             </div>
                         </div>
                     </div>
@@ -738,8 +744,8 @@ class ChatDashboardGenerator:
                         <strong>🤖 AI Response</strong> 
                         <span style="color: #666;">(GPT-2 Generated)</span><br>
                         <div style="margin-top: 10px;">
-                            <div class="response-option" onclick="copyResponse('{ai_response.replace("'", "\\'")}')">
-                                <strong>AI:</strong> {ai_response}
+                            <div class="response-option" onclick="copyResponse({js_arg(ai_response)})">
+                                <strong>AI:</strong> {html.escape(ai_response)}
                             </div>
                         </div>
                     </div>
@@ -762,8 +768,8 @@ class ChatDashboardGenerator:
                 responses_html = ""
                 for i, response in enumerate(suggestion.get('responses', [])[:3], 1):
                     responses_html += f"""
-                    <div class="response-option" onclick="copyResponse('{response.replace("'", "\\'")}')">
-                        <strong>Option {i}:</strong> {response}
+                    <div class="response-option" onclick="copyResponse({js_arg(response)})">
+                        <strong>Option {i}:</strong> {html.escape(response)}
                     </div>
                     """
                 
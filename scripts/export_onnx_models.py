@@ -0,0 +1,124 @@
+"""
+ONNX Model Export
+One-time export of the phase classifier and the GPT-2 chat model to ONNX
+Runtime code picks the exported files up automatically when they exist
+"""
+import sys
+import os
+import json
+import argparse
+import torch
+
+# Set UTF-8 encoding
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from scripts.phase_detector import PhaseClassifier, ONNX_MODEL_NAME, ONNX_INT8_MODEL_NAME
+
+# default model locations (same paths the runtime scripts use)
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASE_MODEL_DIR = os.path.join(project_root, "ai", "phase_detector_trainer", "trained_models", "phase_classifier_v1")
+CHAT_MODEL_DIR = os.path.join(project_root, "ai", "chat_bot_trainer", "trained_models", "final_chat_model", "trained_chat_model_1.0")
+CHAT_ONNX_DIR = os.path.join(project_root, "ai", "chat_bot_trainer", "trained_models", "final_chat_model", "onnx_chat_model")
+
+# export trained phase classifier to ONNX
+#1. load metadata to know number of classes
+#2. build torch model and load trained weights
+#3. export with dynamic batch and sequence axes
+#4. quantize weights to INT8 next to the FP32 export
+def export_phase_classifier(model_dir=PHASE_MODEL_DIR, quantize=True):
+    """Export trained phase classifier to model_dir/phase_classifier.onnx"""
+    metadata_path = os.path.join(model_dir, 'metadata.json')
+    if not os.path.exists(metadata_path):
+        print(f"❌ Trained phase classifier not found at {model_dir}")
+        return None
+
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+
+    print(f"🔄 Exporting phase classifier from {model_dir}...")
+    model = PhaseClassifier(n_classes=len(metadata['phase_labels']))
+    model.load_state_dict(torch.load(os.path.join(model_dir, 'phase_classifier.pth'), map_location='cpu'))
+    model.eval()
+
+    # dummy inputs only define input structure, axes stay dynamic
+    dummy_ids = torch.ones(1, 256, dtype=torch.long)
+    dummy_mask = torch.ones(1, 256, dtype=torch.long)
+    onnx_path = os.path.join(model_dir, ONNX_MODEL_NAME)
+    torch.onnx.export(
+        model,
+        (dummy_ids, dummy_mask),
+        onnx_path,
+        input_names=['input_ids', 'attention_mask'],
+        output_names=['logits'],
+        dynamic_axes={
+            'input_ids': {0: 'batch', 1: 'sequence'},
+            'attention_mask': {0: 'batch', 1: 'sequence'},
+            'logits': {0: 'batch'}
+        },
+        opset_version=17
+    )
+    print(f"✅ Phase classifier exported: {onnx_path}")
+    if quantize:
+        quantize_phase_classifier(onnx_path)
+    return onnx_path
+
+# quantize exported phase classifier weights to INT8
+# runtime prefers the INT8 file, delete it to go back to FP32
+def quantize_phase_classifier(onnx_path):
+    """Write INT8 weight quantized copy of the ONNX classifier"""
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError:
+        print("⚠️ onnxruntime not installed, INT8 quantization skipped: pip install onnxruntime")
+        return None
+
+    int8_path = os.path.join(os.path.dirname(onnx_path), ONNX_INT8_MODEL_NAME)
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"✅ INT8 phase classifier saved: {int8_path}")
+    return int8_path
+
+# export GPT-2 chat model to ONNX with optimum
+#1. use trained chat model if available else base GPT-2
+#2. export with optimum and save next to trained model
+#3. save tokenizer into the same dir so runtime loads both from one place
+def export_chat_model(model_path=None, onnx_dir=CHAT_ONNX_DIR):
+    """Export GPT-2 chat model to an ONNX Runtime model dir"""
+    try:
+        from optimum.onnxruntime import ORTModelForCausalLM
+        from transformers import GPT2Tokenizer
+    except ImportError:
+        print("❌ optimum not installed: pip install optimum[onnxruntime]")
+        return None
+
+    if model_path is None:
+        model_path = CHAT_MODEL_DIR if os.path.exists(CHAT_MODEL_DIR) else "gpt2"
+
+    print(f"🔄 Exporting chat model from {model_path}...")
+    model = ORTModelForCausalLM.from_pretrained(model_path, export=True)
+    model.save_pretrained(onnx_dir)
+    GPT2Tokenizer.from_pretrained(model_path).save_pretrained(onnx_dir)
+    print(f"✅ Chat model exported: {onnx_dir}")
+    return onnx_dir
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description='Export models to ONNX')
+    parser.add_argument('--model', choices=['phase', 'chat', 'all'], default='all',
+                        help='Which model to export (default: all)')
+    parser.add_argument('--no-quantize', action='store_true',
+                        help='Skip INT8 quantization of the phase classifier')
+    args = parser.parse_args()
+
+    exported = []
+    if args.model in ['phase', 'all']:
+        exported.append(export_phase_classifier(quantize=not args.no_quantize))
+    if args.model in ['chat', 'all']:
+        exported.append(export_chat_model())
+
+    return 0 if all(exported) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
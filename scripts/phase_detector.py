@@ -4,15 +4,62 @@ Uses trained model to detect conversation phases
 """
 import torch # lib for models tensor configuration
 import torch.nn as nn # lib for neural network modules
-from transformers import BertTokenizer, BertModel # lib for BERT model and tokenizer
+from transformers import BertTokenizerFast, BertModel # lib for BERT model and fast (Rust) tokenizer
 import json # json lib
+import functools # lib for caching loaded tokenizers
 import os # operating system lib
+import re # regex lib for rule based fast path
 from datetime import datetime # datetime lib
 
-# Set UTF-8 encoding
-import sys # lib for system specific parameters and functions
-if sys.platform == "win32": # if the system is Windows UTF-8 encoding
-    sys.stdout.reconfigure(encoding='utf-8') # to be able to handle special characters
+# orjson parses JSON in Rust and is optional, stdlib json is the fallback
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+# onnxruntime is optional, used when an exported ONNX classifier exists in model dir
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+    ort = None
+
+# file name of exported classifier (see scripts/export_onnx_models.py)
+ONNX_MODEL_NAME = 'phase_classifier.onnx'
+# INT8 weight quantized export, preferred over the FP32 one when present
+ONNX_INT8_MODEL_NAME = 'phase_classifier.int8.onnx'
+
+# keyword rules for short contexts, checked in order, first match wins
+# every rule is (regex, phase), BERT only runs when nothing matches
+# opt-in (PhaseDetector(use_rules=True)), can be overridden with phase_rules.json next to metadata.json
+DEFAULT_PHASE_RULES = [
+    (r'\b(accept(ed)? (the |my )?(contract|offer)|sent (you )?an offer|hire you)\b', 'contract_acceptance'),
+    (r'\b(budget|rate|price|pricing|per hour|hourly|per word)\b|\$\d', 'rate_negotiation'),
+    (r'\b(deadline|deliver|due date|timeline|by (monday|tuesday|wednesday|thursday|friday|saturday|sunday|tomorrow))\b', 'deadline_samples'),
+    (r'\b(language|english|dutch|german|spanish|french|native speaker|fluent)\b', 'language_confirm'),
+    (r'\b(format|structure|headings?|outline|word count)\b', 'structure_clarification'),
+    (r'\b(experience with|familiar with|do you know|have you (ever )?worked)\b', 'knowledge_check'),
+    (r'^\W*(\w+:\s*)?(hi|hello|hey|good (morning|afternoon|evening|day))\b|\bare you available\b', 'initial_response'),
+]
+# contexts longer than this always go to BERT (rules would match stale keywords)
+RULE_MAX_CHARS = 200
+# confidence reported for rule matches (fixed value, not a model probability)
+RULE_CONFIDENCE = 0.95
+
+# load tokenizer once per model directory and reuse it across detectors
+@functools.lru_cache(maxsize=4)
+def _load_shared_tokenizer(model_dir):
+    return BertTokenizerFast.from_pretrained(model_dir)
+
+# fast tokenizers are not safe to use from two threads at once,
+# detectors that run in parallel (replica pool) load a private one
+def _load_tokenizer(model_dir, shared=True):
+    if shared:
+        return _load_shared_tokenizer(model_dir)
+    return BertTokenizerFast.from_pretrained(model_dir)
 
 # class for setting up model pipeline
 class PhaseClassifier(nn.Module):
@@ -58,7 +105,9 @@ class PhaseDetector:
     #6. load the trained version of the model
     #7. move model to device
     #8. set model to evaluation mode
-    def __init__(self, model_dir=None):
+    #9. on CPU quantize linear layers to INT8 for faster inference
+    # device picks the GPU (e.g. 'cuda:1'), shared_tokenizer=False gives the detector its own tokenizer
+    def __init__(self, model_dir=None, use_rules=False, device=None, shared_tokenizer=True):
         """Initialize PhaseDetector with fallback to base BERT if trained model not found"""
         
         # Use default path if none provided
@@ -72,7 +121,16 @@ class PhaseDetector:
             )
         
         self.model_dir = model_dir
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        # compiled keyword rules for the fast path (empty list disables it)
+        self.rules = self._load_rules(model_dir) if use_rules else []
+        self.device = torch.device(device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+        self.shared_tokenizer = shared_tokenizer
+        # ONNX Runtime session, set when an exported model is loaded
+        self.ort_session = None
+        # True when model was wrapped with torch.compile
+        self.is_compiled = False
+        # weight file the model was loaded from (None for base BERT fallback)
+        self.weights_path = None
         
         # Try to load trained model first
         if os.path.exists(model_dir) and os.path.exists(os.path.join(model_dir, 'metadata.json')):
@@ -92,27 +150,146 @@ class PhaseDetector:
             print(f"🔄 Using base BERT model (fallback)")
             self._load_fallback_model()
 
+        # reusable fixed-shape input buffers for single predict calls
+        # (created before compiling, the trial run after torch.compile uses them)
+        self._ids_buf = torch.zeros(1, 256, dtype=torch.long, device=self.device)
+        self._mask_buf = torch.zeros(1, 256, dtype=torch.long, device=self.device)
+
+        # ONNX Runtime session is already optimized, torch tweaks only apply to torch model
+        if self.ort_session is None:
+            # CPU inference is dominated by BERT dense layers, INT8 weights make them 2-4x faster
+            if self.device.type == 'cpu':
+                self._quantize_for_cpu()
+            # on GPU run in half precision (BF16 where supported) and compile the model,
+            # fixed input shape lets it capture one CUDA graph
+            else:
+                self.model.to(torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16)
+                self._compile_for_gpu()
+
+    def _load_rules(self, model_dir):
+        """Load keyword rules (phase_rules.json if present, else defaults) and compile them"""
+        rules = DEFAULT_PHASE_RULES
+        rules_path = os.path.join(model_dir, 'phase_rules.json')
+        if os.path.exists(rules_path):
+            try:
+                with open(rules_path, 'r', encoding='utf-8') as f:
+                    rules = [tuple(rule) for rule in json.load(f)]
+            except Exception as e:
+                print(f"⚠️ Error loading phase rules, using defaults: {e}")
+        return [(re.compile(pattern, re.IGNORECASE), phase) for pattern, phase in rules]
+
+    def _match_rules(self, context):
+        """Return phase of first matching rule for short contexts, else None"""
+        if not self.rules or len(context) > RULE_MAX_CHARS:
+            return None
+        for pattern, phase in self.rules:
+            if pattern.search(context):
+                return phase
+        return None
+
+    def _compile_for_gpu(self):
+        """Compile model with torch.compile (reduce-overhead uses CUDA graphs)"""
+        if not hasattr(torch, 'compile'):
+            return
+        eager_model = self.model
+        try:
+            # dynamic shapes so batch/sequence changes reuse the compiled (and disk cached) graph
+            compiled = torch.compile(self.model, mode='reduce-overhead', fullgraph=True, dynamic=True)
+            # torch.compile is lazy, backend errors (e.g. no triton) only show up on the first call,
+            # so run one trial forward with the predict buffer shapes before using it
+            self._mask_buf.fill_(1)
+            with torch.inference_mode():
+                compiled(self._ids_buf, self._mask_buf)
+            self.model = compiled
+            self.is_compiled = True
+            print(f"[INFO] Phase classifier compiled with torch.compile")
+        except Exception as e:
+            # compile backend is not available everywhere, eager still works
+            self.model = eager_model
+            self.is_compiled = False
+            print(f"⚠️ torch.compile skipped, using eager model: {e}")
+
+    def use_eager(self):
+        """Drop the torch.compile wrapper and run the original eager model"""
+        if self.is_compiled:
+            self.model = getattr(self.model, '_orig_mod', self.model)
+            self.is_compiled = False
+
+    def _quantize_for_cpu(self):
+        """Apply dynamic INT8 quantization to Linear layers"""
+        try:
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {nn.Linear}, dtype=torch.qint8
+            )
+            self.model.eval()
+            print(f"[INFO] Phase classifier quantized to INT8 (CPU)")
+        except Exception as e:
+            # quantization engine missing on some platforms, FP32 model still works
+            print(f"⚠️ INT8 quantization skipped: {e}")
+
     def _load_trained_model(self, model_dir):
         """Load trained model"""
         # Load metadata
         metadata_path = os.path.join(model_dir, 'metadata.json')
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            self.metadata = json.load(f)
+        with open(metadata_path, 'rb') as f:
+            raw = f.read()
+        self.metadata = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw.decode('utf-8'))
         
         self.phase_labels = self.metadata['phase_labels']
         self.id_to_phase = {int(k): v for k, v in self.metadata['id_to_phase'].items()}
         
         # Load tokenizer and model
-        self.tokenizer = BertTokenizer.from_pretrained(model_dir)
+        self.tokenizer = _load_tokenizer(model_dir, self.shared_tokenizer)
+
+        # exported ONNX model runs on ONNX Runtime, torch model is not built at all
+        # (INT8 quantized export first, then FP32 export)
+        for onnx_name in (ONNX_INT8_MODEL_NAME, ONNX_MODEL_NAME):
+            onnx_path = os.path.join(model_dir, onnx_name)
+            if ONNXRUNTIME_AVAILABLE and os.path.exists(onnx_path):
+                self._load_onnx_session(onnx_path)
+                self.weights_path = onnx_path
+                self.is_trained_model = True
+                return
+
         self.model = PhaseClassifier(n_classes=len(self.phase_labels))
         
         model_path = os.path.join(model_dir, 'phase_classifier.pth')
         self.model.load_state_dict(torch.load(model_path, map_location=self.device))
+        self.weights_path = model_path
         self.model.to(self.device)
         self.model.eval()
         
         self.is_trained_model = True
 
+    def _load_onnx_session(self, onnx_path):
+        """Load exported classifier into an ONNX Runtime session (CPU)"""
+        options = ort.SessionOptions()
+        # fuse LayerNorm/GELU/MatMul and other graph level optimizations
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.ort_session = ort.InferenceSession(
+            onnx_path, sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self.model = None
+        # session runs on CPU, keep input buffers there
+        self.device = torch.device('cpu')
+        print(f"[INFO] Using ONNX Runtime model: {os.path.basename(onnx_path)}")
+
+    # run classifier on inputs and return logits
+    # uses ONNX Runtime session when loaded, otherwise the torch model
+    def _forward(self, input_ids, attention_mask):
+        """Return classifier logits for a batch"""
+        if self.ort_session is not None:
+            logits = self.ort_session.run(
+                ['logits'],
+                {
+                    'input_ids': input_ids.cpu().numpy(),
+                    'attention_mask': attention_mask.cpu().numpy()
+                }
+            )[0]
+            return torch.from_numpy(logits)
+        # softmax and confidence stay FP32 even when the model runs in half precision
+        return self.model(input_ids, attention_mask).float()
+
     def _load_fallback_model(self):
         """Load base BERT model as fallback"""
         # Create default phase mapping for base BERT
@@ -123,7 +300,7 @@ class PhaseDetector:
         self.id_to_phase = {i: label for i, label in enumerate(self.phase_labels)}
         
         # Load base BERT
-        self.tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
+        self.tokenizer = _load_tokenizer('bert-base-uncased', self.shared_tokenizer)
         self.model = PhaseClassifier(n_classes=len(self.phase_labels))
         
         # Initialize with random weights (base model)
@@ -142,30 +319,54 @@ class PhaseDetector:
     #1. tokenize the context text
     #2. from tokenized text give tokens the id
     #3. from tokenized text get tokens that are not relevant and give them "mask" for AI to not consider
-    #4. use model to predict and not to teach him torch.no_grad
+    #4. use model to predict and not to teach him torch.inference_mode
     #5. return result dictionary with phase and confidence score
     #6. optional return of all probabilities with their phase labels
+    # with use_rules short contexts that match a keyword rule skip BERT entirely
     def predict(self, context, return_probabilities=False):
         """Predict conversation phase from context"""
-        # Tokenize
-        encoding = self.tokenizer.encode_plus(
+        # fast path: obvious short messages are classified by keyword rules
+        rule_phase = self._match_rules(context)
+        if rule_phase is not None:
+            return self._rule_result(rule_phase, return_probabilities)
+        return self._predict_model(context, return_probabilities)
+
+    def _rule_result(self, rule_phase, return_probabilities=False):
+        """Result dict for a keyword rule match (same shape as a model result)"""
+        result = {
+            'phase': rule_phase,
+            'confidence': RULE_CONFIDENCE,
+            'model_type': 'rules'
+        }
+        if return_probabilities:
+            result['all_probabilities'] = {
+                label: RULE_CONFIDENCE if label == rule_phase else 0.0
+                for label in self.phase_labels
+            }
+        return result
+
+    def _predict_model(self, context, return_probabilities=False):
+        """Predict phase of one context with the classifier"""
+        # Tokenize to plain lists, shape is always (1, 256)
+        encoding = self.tokenizer(
             context, # text to be tokenized
             add_special_tokens=True, # add special tokens
             max_length=256, # max length of tokens
             padding='max_length',
             truncation=True,
-            return_attention_mask=True,
-            return_tensors='pt'
+            return_attention_mask=True
         )
-        # get id of the tokenized text and move to device 
-        input_ids = encoding['input_ids'].to(self.device) 
+        # copy ids of the tokenized text into the preallocated device buffer
+        self._ids_buf[0].copy_(torch.as_tensor(encoding['input_ids']))
         # attention mask to ignore the tockens that are just padding
-        attention_mask = encoding['attention_mask'].to(self.device)
+        self._mask_buf[0].copy_(torch.as_tensor(encoding['attention_mask']))
+        input_ids = self._ids_buf
+        attention_mask = self._mask_buf
 
-        # use model to predict and don't teach it (no grad)
-        with torch.no_grad():
+        # use model to predict and don't teach it (inference mode skips autograd bookkeeping)
+        with torch.inference_mode():
             # put inputs through the model and attention mask to get outputs
-            outputs = self.model(input_ids, attention_mask)
+            outputs = self._forward(input_ids, attention_mask)
             # get probabilities of every class guess and than
             probabilities = torch.softmax(outputs, dim=1)
             # inside confidence and predticted put the class with most confidence
@@ -195,11 +396,58 @@ class PhaseDetector:
             result['all_probabilities'] = all_probs
         
         return result
-    # loops through multiple contexts to predict their phases and predict for all
+    # run one full model prediction so compilation happens before real requests
+    def warmup(self):
+        """Warm up model (triggers torch.compile graph capture)"""
+        # bypass the keyword fast path so the model really runs
+        self._predict_model("client: warmup")
+
+    # predict phases for multiple contexts in one pass
+    #1. tokenize all contexts in one call (padded to longest in batch)
+    #2. run one batched forward pass instead of one per context
+    #3. map every row to phase and confidence like predict does
+    # keyword rules apply per context exactly as in predict, BERT only sees the rest
     def predict_batch(self, contexts):
         """Predict phases for multiple contexts"""
-        results = []
-        for context in contexts:
-            result = self.predict(context)
-            results.append(result)
+        if not contexts:
+            return []
+        contexts = list(contexts)
+        results = [None] * len(contexts)
+        model_rows = []
+        for i, context in enumerate(contexts):
+            rule_phase = self._match_rules(context)
+            if rule_phase is not None:
+                results[i] = self._rule_result(rule_phase)
+            else:
+                model_rows.append(i)
+        if not model_rows:
+            return results
+        # tokenize all remaining contexts at once
+        encoding = self.tokenizer(
+            [contexts[i] for i in model_rows],
+            add_special_tokens=True,
+            max_length=256,
+            padding=True,
+            truncation=True,
+            return_attention_mask=True,
+            return_tensors='pt'
+        )
+        input_ids = encoding['input_ids'].to(self.device)
+        attention_mask = encoding['attention_mask'].to(self.device)
+
+        # one forward pass for the whole batch
+        with torch.inference_mode():
+            outputs = self._forward(input_ids, attention_mask)
+            probabilities = torch.softmax(outputs, dim=1)
+            confidences, predicted = torch.max(probabilities, 1)
+
+        for i, confidence, pred in zip(model_rows, confidences.tolist(), predicted.tolist()):
+            # Adjust confidence for untrained model
+            if not self.is_trained_model:
+                confidence = confidence * 0.3
+            results[i] = {
+                'phase': self.id_to_phase[pred],
+                'confidence': round(confidence, 4),
+                'model_type': 'trained' if self.is_trained_model else 'base_bert'
+            }
         return results
@@ -7,17 +7,107 @@ import sys
 import os
 import json
 import argparse
+import atexit
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-import torch
-from transformers import GPT2LMHeadModel, GPT2Tokenizer
 
-# Set UTF-8 encoding
-if sys.platform == "win32":
-    sys.stdout.reconfigure(encoding='utf-8')
+# orjson is optional, faster encoding of the dashboard temp file
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+# torch/transformers take seconds to import and template mode never uses them,
+# _import_ml_libs() fills these in on first GPT-2 use
+torch = None
+GPT2LMHeadModel = None
+GPT2Tokenizer = None
+ORTModelForCausalLM = None
+PREFIX_CACHE_SUPPORTED = False
+ORT_AVAILABLE = False
+
+def _import_ml_libs():
+    """Import torch, transformers and optional optimum once per process"""
+    global torch, GPT2LMHeadModel, GPT2Tokenizer, ORTModelForCausalLM
+    global PREFIX_CACHE_SUPPORTED, ORT_AVAILABLE
+    if torch is not None:
+        return
+    import torch as _torch
+    from transformers import GPT2LMHeadModel as _GPT2LMHeadModel, GPT2Tokenizer as _GPT2Tokenizer
+    GPT2LMHeadModel, GPT2Tokenizer = _GPT2LMHeadModel, _GPT2Tokenizer
+
+    # generate() only continues from a prefilled KV cache correctly on transformers
+    # versions that ship the Cache API, older versions would skip the prompt tail
+    try:
+        from transformers import DynamicCache
+        PREFIX_CACHE_SUPPORTED = True
+    except ImportError:
+        PREFIX_CACHE_SUPPORTED = False
+
+    # optimum is optional, used when an exported ONNX chat model exists
+    try:
+        from optimum.onnxruntime import ORTModelForCausalLM as _ORTModelForCausalLM
+        ORTModelForCausalLM = _ORTModelForCausalLM
+        ORT_AVAILABLE = True
+    except ImportError:
+        ORT_AVAILABLE = False
+
+    # no process-wide torch settings here (autograd is off per call via torch.inference_mode),
+    # thread count is set by main()
+    # set last, other threads treat torch != None as "everything imported"
+    torch = _torch
 
 # Add parent directory to path and import database manager
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from data.chat_database_manager import ChatDatabase
+from data.chat_database_manager import ChatDatabase, build_context
+
+# per-request diagnostics go through logging (LOG_LEVEL env, configured in main)
+logger = logging.getLogger(__name__)
+
+# file that keeps AI responses between runs, keyed by phase and context hash
+AI_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai', '.ai_response_cache.json')
+# max number of cached AI responses
+AI_CACHE_SIZE = 512
+# max GPT-2 tokens of conversation context that go into the prompt
+CONTEXT_MAX_TOKENS = 128
+
+# static start of every GPT-2 prompt, its KV cache is computed once per process
+_PROMPT_PREFIX = """You are a professional freelancer responding to a client in an Upwork chat conversation.
+
+PHASE MEANINGS:
+- initial_response: Client is asking if you're available for work
+- ask_details: Client wants more information about project scope  
+- knowledge_check: Client is testing your expertise in specific topics
+- language_confirm: Client is asking about language preferences
+- rate_negotiation: Client is discussing pricing and budget
+- deadline_samples: Client is asking about delivery timelines
+- structure_clarification: Client wants to know about content format/structure
+- contract_acceptance: Client is ready to hire and wants you to accept contract
+
+"""
+
+# full GPT-2 prompt, only context and phase are filled in per request
+_PROMPT_TEMPLATE = _PROMPT_PREFIX + """CONVERSATION CONTEXT:
+{context}
+
+AI PHASE DETECTION RESULT:
+The AI system has analyzed this conversation and detected that the client is in the "{phase}" phase.
+
+YOUR TASK:
+Write a professional, friendly response that addresses the "{phase}" phase appropriately. 
+- Keep it concise (1-3 sentences)
+- Sound natural and conversational
+- Be enthusiastic and professional
+- Directly address what the client needs in this phase
+
+Response:"""
 
 # class that connects to database initializes templates, and implements AI chat response generation
 class SmartChatResponse:
@@ -29,18 +119,43 @@ class SmartChatResponse:
     # generate_single_response generates text based on prompt
     class ChatGPT2Generator:
         """Simplified GPT-2 generator integrated into SmartChatResponse"""
+        # max number of prompts kept in response cache
+        RESPONSE_CACHE_SIZE = 1024
         # loads components for GPT-2 model
         # 1. set model path based on trained model if available else use base GPT-2
+        #    (exported ONNX model is preferred and runs on ONNX Runtime)
         # 2. load tokenizer from model path
-        # 3. load model from model path
-        # 4. set pad token if not set
-        # 5. set hardware device to choose CUDA if available else CPU
+        # 3. set hardware device to choose CUDA if available else CPU
+        # 4. load model from model path (BF16 or FP16 weights on CUDA)
+        # 5. set pad token if not set
         # 6. load model to hardware device and set to eval mode
         def __init__(self):
+            _import_ml_libs()
             print("Loading GPT-2...")
             # Check for trained model first
             project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             trained_model_path = os.path.join(project_root, "ai", "chat_bot_trainer", "trained_models", "final_chat_model", "trained_chat_model_1.0")
+            # ONNX export of the chat model (see scripts/export_onnx_models.py)
+            onnx_model_path = os.path.join(project_root, "ai", "chat_bot_trainer", "trained_models", "final_chat_model", "onnx_chat_model")
+            # shared system prefix and its KV cache, filled by set_system_prefix
+            self._prefix_text = None
+            self._prefix_ids = None
+            self._prefix_past = None
+            # LRU cache of generated responses keyed by (prompt, max_length)
+            self._response_cache = OrderedDict()
+            # if ONNX export is found load it with ONNX Runtime and skip torch setup
+            if ORT_AVAILABLE and os.path.exists(onnx_model_path):
+                print("🎯 Using ONNX Runtime chat model")
+                self.backend = 'onnx'
+                self.tokenizer = GPT2Tokenizer.from_pretrained(onnx_model_path)
+                self.model = ORTModelForCausalLM.from_pretrained(onnx_model_path)
+                self.device = torch.device("cpu")
+                self.dtype = torch.float32
+                if self.tokenizer.pad_token is None:
+                    self.tokenizer.pad_token = self.tokenizer.eos_token
+                print("✅ GPT-2 Ready")
+                return
+            self.backend = 'torch'
             # if trained model is found set model_path to it
             if os.path.exists(trained_model_path):
                 print("🎯 Using TRAINED model for better responses")
@@ -52,108 +167,175 @@ class SmartChatResponse:
             
             # Load tokenizer
             self.tokenizer = GPT2Tokenizer.from_pretrained(model_path)
+            # Set hardware device to use CUDA if available else CPU
+            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            # half precision on GPU halves VRAM and KV cache size (BF16 where supported,
+            # same range as FP32 so no overflow), CPU stays FP32
+            if self.device.type == 'cuda':
+                self.dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            else:
+                self.dtype = torch.float32
             # load model
-            self.model = GPT2LMHeadModel.from_pretrained(model_path)
+            self.model = GPT2LMHeadModel.from_pretrained(model_path, torch_dtype=self.dtype)
             
             # Set pad token
             if self.tokenizer.pad_token is None:
                 self.tokenizer.pad_token = self.tokenizer.eos_token
             
-            # Set hardware device to use CUDA if available else CPU
-            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
             # load model to hardware device
             self.model.to(self.device)
             # set model to eval mode
             self.model.eval()
             print("✅ GPT-2 Ready")
+        # function to prefill a prompt prefix that every request shares
+        # 1. tokenize prefix once
+        # 2. run model once over it and keep past_key_values
+        # 3. generate_single_response then only prefills the prompt tail
+        def set_system_prefix(self, text):
+            """Precompute KV cache for a shared prompt prefix"""
+            if not PREFIX_CACHE_SUPPORTED or self.backend != 'torch':
+                print("[INFO] Prefix KV cache not supported by this backend")
+                return
+            prefix_ids = self.tokenizer.encode(text, return_tensors='pt').to(self.device)
+            with torch.inference_mode():
+                outputs = self.model(prefix_ids, use_cache=True)
+            self._prefix_text = text
+            self._prefix_ids = prefix_ids
+            self._prefix_past = outputs.past_key_values
+        # function to cut text to its last max_tokens GPT-2 tokens
+        # (cuts on token boundary and bounds prompt length exactly, unlike a character slice)
+        def truncate_to_tokens(self, text, max_tokens):
+            """Return tail of text that fits in max_tokens tokens"""
+            # byte-level BPE: every token covers at least one UTF-8 byte (a character can
+            # take several tokens), so only text with no more bytes than max_tokens surely fits
+            if len(text.encode('utf-8')) <= max_tokens:
+                return text
+            ids = self.tokenizer.encode(text)
+            if len(ids) <= max_tokens:
+                return text
+            return self.tokenizer.decode(ids[-max_tokens:])
         # function to generate response
         # takes prompt and max_length as input
         # 1. encode prompt using tokenizer and move to hardware device
+        #    (if prompt starts with the cached system prefix only the tail is encoded)
         # 2. generate outputs with model.generate using parameters for text generation
+        #    (KV cache on)
         # 3. decode generated outputs to text
         # 4. simple cleanup to ensure proper ending punctuation     
+        # 5. repeated prompts are answered from LRU cache without running GPT-2
         def generate_single_response(self, prompt, max_length=80):
             """Simple GPT-2 text generation"""
+            cache_key = (prompt, max_length)
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                self._response_cache.move_to_end(cache_key)
+                return cached
             try:
-                # tokenize prompt and move to hardware device
-                inputs = self.tokenizer.encode(prompt, return_tensors='pt').to(self.device)
+                past_key_values = None
+                # prompt starts with cached prefix, encode only the tail and reuse prefix KV cache
+                if self._prefix_past is not None and prompt.startswith(self._prefix_text):
+                    tail_ids = self.tokenizer.encode(prompt[len(self._prefix_text):], return_tensors='pt').to(self.device)
+                    inputs = torch.cat([self._prefix_ids, tail_ids], dim=1)
+                    past_key_values = self._prefix_past
+                else:
+                    # tokenize prompt and move to hardware device
+                    inputs = self.tokenizer.encode(prompt, return_tensors='pt').to(self.device)
+                # explicit attention mask (pad token equals eos token so HF can't infer it)
+                attention_mask = torch.ones_like(inputs)
+                # generation parameters, KV cache keeps every step O(n) instead of O(n^2)
+                gen_kwargs = dict(
+                    attention_mask=attention_mask,
+                    max_length=inputs.shape[1] + max_length,
+                    temperature=0.7,
+                    do_sample=True,
+                    top_p=0.9,
+                    pad_token_id=self.tokenizer.eos_token_id,
+                    use_cache=True
+                )
                 # generate outputs with the initialized model
-                # use torch.no_grad because no training is happening only inference
-                with torch.no_grad():
-                    outputs = self.model.generate(
-                        inputs,
-                        max_length=inputs.shape[1] + max_length,
-                        temperature=0.7,
-                        do_sample=True,
-                        top_p=0.9,
-                        pad_token_id=self.tokenizer.eos_token_id,
-                        no_repeat_ngram_size=2
-                    )
-                # decode generated outputs to text
-                generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-                # extract response part
-                response = generated_text[len(prompt):].strip()
+                # use torch.inference_mode because no training is happening only inference
+                # (cheaper than no_grad, skips view and version tracking)
+                # on GPU run under half precision autocast, on CPU autocast is disabled
+                with torch.inference_mode(), torch.autocast(
+                    device_type=self.device.type,
+                    dtype=self.dtype,
+                    enabled=self.device.type == 'cuda'
+                ):
+                    if past_key_values is not None:
+                        # generate extends the cache in place, work on a copy
+                        gen_kwargs['past_key_values'] = copy.deepcopy(past_key_values)
+                    outputs = self.model.generate(inputs, **gen_kwargs)
+                # decode only newly generated tokens to text (response part)
+                response = self.tokenizer.decode(outputs[0][inputs.shape[1]:], skip_special_tokens=True).strip()
                 
                 # Simple cleanup
                 if not response.endswith(('.', '!', '?')) and len(response) > 10:
                     response = response.rsplit(' ', 1)[0] + '.'
                 
-                return response[:150] if len(response) > 150 else response
+                response = response[:150] if len(response) > 150 else response
+                # remember response, drop least recently used entry when full
+                self._response_cache[cache_key] = response
+                if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+                    self._response_cache.popitem(last=False)
+                return response
                 
             except Exception as e:
-                print(f"GPT-2 Error: {e}")
-                return "Thank you for your message."
+                # no fallback text here, caller decides (and must not cache a failed run)
+                logger.warning("GPT-2 Error: %s", e)
+                return None
     # templates dict for each phase (detected by BERT AI)
     # NOTE: Only 8 phases match trained BERT model - extras removed for clarity
     # and one fallback 'general_inquiry' added
     TEMPLATES = {
-        'initial_response': [
+        'initial_response': (
             "Thank you for reaching out! I'm very interested. Could you tell me more about the project?",
             "Good day! I'm available. What are the main deliverables?",
             "Hello! I'd be happy to help. Can you share more details?"
-        ],
-        'ask_details': [
+        ),
+        'ask_details': (
             "Could you provide more details about the project scope?",
             "What specific requirements do you have in mind?",
             "I'd love to learn more about what you're looking for!"
-        ],
-        'knowledge_check': [
+        ),
+        'knowledge_check': (
             "Yes, I have extensive experience with that topic. Let me show you my expertise.",
             "Absolutely! I'm well-versed in that area. Would you like some examples?",
             "I'm confident in handling that subject. What specific aspects interest you?"
-        ],
-        'language_confirm': [
+        ),
+        'language_confirm': (
             "I'm fluent in both languages. Which would you prefer for this project?",
             "I can work in either language comfortably. What's your preference?",
             "Both languages work for me. Which fits your target audience better?"
-        ],
-        'rate_negotiation': [
+        ),
+        'rate_negotiation': (
             "That rate works perfectly for me. When can we start?",
             "I'm comfortable with that pricing. What's the next step?",
             "Great! That rate is acceptable. Should we proceed with the contract?"
-        ],
-        'deadline_samples': [
+        ),
+        'deadline_samples': (
             "Absolutely! I can deliver by that deadline. Should I start immediately?",
             "Yes, that timeline works perfectly. I'll prioritize your project.",
             "I can definitely meet that deadline. Let's get started!"
-        ],
-        'structure_clarification': [
+        ),
+        'structure_clarification': (
             "Perfect! I understand the structure requirements. I'll follow that format exactly.",
             "Got it! I'll include all those elements in the proper structure.",
             "Understood! I'll make sure each piece follows that exact format."
-        ],
-        'contract_acceptance': [
+        ),
+        'contract_acceptance': (
             "Contract accepted! Starting work now. You'll have it by the deadline.",
             "Thank you! I've accepted and will begin immediately.",
             "Great! Contract signed. I'm diving into the first batch now."
-        ],
+        ),
         # Fallback for unknown phases or errors
-        'general_inquiry': [
+        'general_inquiry': (
             "Could you provide more details about what you're looking for?",
             "I'd be glad to assist! Can you clarify what you need?",
             "Let me know the specifics and I'll help!"
-        ]
+        )
     }
+    # template tuples per phase for every possible num_options (index = number of options)
+    _SLICES = {phase: tuple(t[:n] for n in range(len(t) + 1)) for phase, t in TEMPLATES.items()}
     # funtion that initialises variables
     #1. var to hold project root
     #2. var to hold path to database
@@ -166,6 +348,20 @@ class SmartChatResponse:
         db_path = os.path.join(project_root, "data", "chat_data.db")
         # var for database
         self.db = ChatDatabase(db_path)
+        # AI responses from earlier runs, saved back when process exits
+        self._ai_cache = self._load_ai_cache()
+        self._ai_cache_dirty = False
+        # async AI worker thread and main thread both change the cache
+        self._ai_cache_lock = threading.Lock()
+        atexit.register(self._save_ai_cache)
+        # AI generations running right now, same phase and context waits for that run
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # background GPT-2 for async 'both' mode (worker thread starts on first submit)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        # counts temp file saves, late AI result only overwrites the save it belongs to
+        self._temp_saves = 0
+        self._temp_lock = threading.Lock()
         
         print("\n" + "="*60)
         print("INITIALIZING SMART CHAT RESPONSE")
@@ -196,7 +392,7 @@ class SmartChatResponse:
         # and return messages as context limiting to max_messages var that is passed
         messages = self.db.get_recent_messages(session_id, limit=max_messages)
         # make dictionary of messages
-        context = "\n".join([f"{m['sender_type']}: {m['text']}" for m in messages])
+        context = build_context(messages)
         return context, session_id
 
     # function that takes phase as input and generates template responses based on phase
@@ -205,9 +401,9 @@ class SmartChatResponse:
     # 2. returns list of template responses up to num_options or available templates
     def generate_template_response(self, phase, num_options=3):
         """Generate template responses"""
-        templates = self.TEMPLATES.get(phase, self.TEMPLATES['general_inquiry'])
+        slices = self._SLICES.get(phase, self._SLICES['general_inquiry'])
         # imside template responses for phase return lesser numer => num_options or available templates
-        return templates[:min(num_options, len(templates))]
+        return list(slices[min(num_options, len(slices) - 1)])
     # function to save results to temp file for dashboard
     # takes result dict as input, result is output of generate() function
     #1. var to hold temp file path
@@ -215,6 +411,13 @@ class SmartChatResponse:
     #3. based on result content append appropriate fields to temp_data
     def save_to_temp_file(self, result):
         """Save results to temp file for dashboard"""
+        with self._temp_lock:
+            self._temp_saves += 1
+            self._write_temp_file(result)
+            return self._temp_saves
+
+    def _write_temp_file(self, result):
+        """Write temp file for dashboard (caller holds _temp_lock)"""
         try:
             # var to hold temp file path
             temp_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'temp_ai_suggestions.json')
@@ -245,18 +448,71 @@ class SmartChatResponse:
                 temp_data['suggestion_type'] = result.get('mode', 'template')
                 temp_data['responses'] = result['responses']
             
-            # Save to file
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(temp_data, f, ensure_ascii=False, indent=2)
+            # Save to file: write next to it and rename so dashboard never reads a half written file
+            if ORJSON_AVAILABLE:
+                data = orjson.dumps(temp_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str)
+            else:
+                data = json.dumps(temp_data, ensure_ascii=False, indent=2, default=str).encode('utf-8')
+            tmp_file = temp_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, temp_file)
             # log it  
-            print(f"[SAVE] Results saved to temp_ai_suggestions.json")
+            logger.debug("[SAVE] Results saved to temp_ai_suggestions.json")
             
         except Exception as e:
-            print(f"[WARN] Failed to save temp file: {e}")
+            logger.warning("[WARN] Failed to save temp file: %s", e)
+
+    # load persisted AI response cache (empty cache if file missing or broken)
+    def _load_ai_cache(self):
+        """Load AI response cache from disk"""
+        try:
+            with open(AI_CACHE_PATH, 'r', encoding='utf-8') as f:
+                return OrderedDict(json.load(f))
+        except (OSError, ValueError):
+            return OrderedDict()
+
+    # save AI response cache to disk if anything new was generated
+    def _save_ai_cache(self):
+        """Persist AI response cache"""
+        with self._ai_cache_lock:
+            if not self._ai_cache_dirty:
+                return
+            entries = list(self._ai_cache.items())
+            self._ai_cache_dirty = False
+        try:
+            with open(AI_CACHE_PATH, 'w', encoding='utf-8') as f:
+                json.dump(dict(entries), f, ensure_ascii=False)
+        except Exception as e:
+            with self._ai_cache_lock:
+                self._ai_cache_dirty = True
+            logger.warning("[WARN] Failed to save AI response cache: %s", e)
+
+    # run fn once per key at a time, concurrent callers with the same key
+    # wait for the running call and share its result (or exception)
+    def _single_flight(self, key, fn, *args):
+        """Deduplicate concurrent calls with the same key"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if leader:
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+        return future.result()
 
     # function that takes phase as input and generates AI response using GPT-2
     # takes phase, context and session_id as input
-    # 1. try to import ChatGPT2Generator from ai.chat_gpt2_generator
+    # 0. same phase and context as before returns cached response,
+    #    same phase and context being generated right now waits for that generation
+    # 1. get shared ChatGPT2Generator (loaded once per process)
     # 2. puts ChatGPT2Generator in gpt2 variable
     # 3. create detailed prompt which includes context and phase information
     # 4. call gpt2.generate_single_response with custom_prompt
@@ -264,60 +520,93 @@ class SmartChatResponse:
     # 6. else return AI failure message
     def generate_ai_response(self, phase, context, session_id):
         """Generate AI response using integrated GPT-2"""
+        # cache key: phase + hash of the context (prompt is built from its token tail)
+        cache_key = f"{phase}:{hashlib.sha1(context.encode('utf-8')).hexdigest()}"
+        with self._ai_cache_lock:
+            if cache_key in self._ai_cache:
+                self._ai_cache.move_to_end(cache_key)
+                return self._ai_cache[cache_key]
+        return self._single_flight(cache_key, self._generate_ai_uncached, phase, context, cache_key)
+
+    def _generate_ai_uncached(self, phase, context, cache_key):
+        """Run GPT-2 for a cache miss and store the response"""
         try:
-            # Use internal GPT-2 generator
-            if not hasattr(self, '_gpt2_generator'):
-                self._gpt2_generator = self.ChatGPT2Generator()
+            # Use shared GPT-2 generator (weights load once per process)
+            gpt2 = get_gpt2_generator()
             
             # Create detailed prompt for better GPT-2 response
-            prompt = f"""You are a professional freelancer responding to a client in an Upwork chat conversation.
-
-CONVERSATION CONTEXT:
-{context[-500:]}
-
-AI PHASE DETECTION RESULT:
-The AI system has analyzed this conversation and detected that the client is in the "{phase}" phase.
-
-PHASE MEANINGS:
-- initial_response: Client is asking if you're available for work
-- ask_details: Client wants more information about project scope  
-- knowledge_check: Client is testing your expertise in specific topics
-- language_confirm: Client is asking about language preferences
-- rate_negotiation: Client is discussing pricing and budget
-- deadline_samples: Client is asking about delivery timelines
-- structure_clarification: Client wants to know about content format/structure
-- contract_acceptance: Client is ready to hire and wants you to accept contract
-
-YOUR TASK:
-Write a professional, friendly response that addresses the "{phase}" phase appropriately. 
-- Keep it concise (1-3 sentences)
-- Sound natural and conversational
-- Be enthusiastic and professional
-- Directly address what the client needs in this phase
-
-Response:"""
+            # (static part first so its KV cache is reused, see _PROMPT_PREFIX)
+            prompt = _PROMPT_TEMPLATE.format(
+                context=gpt2.truncate_to_tokens(context, CONTEXT_MAX_TOKENS),
+                phase=phase
+            )
             
             # Generate response using internal GPT-2
-            ai_response = self._gpt2_generator.generate_single_response(prompt)
+            ai_response = gpt2.generate_single_response(prompt)
             
+            # GPT-2 failed: fallback text for this call only, never cached
+            if ai_response is None:
+                return "Thank you for your message."
             # Return response or error message
             if ai_response:
+                # remember response, drop least recently used entry when full
+                with self._ai_cache_lock:
+                    self._ai_cache[cache_key] = ai_response
+                    if len(self._ai_cache) > AI_CACHE_SIZE:
+                        self._ai_cache.popitem(last=False)
+                    self._ai_cache_dirty = True
                 return ai_response
             else:
                 return "[AI Error] GPT-2 response generation failed. Please try again or use template mode."
         except Exception as e:
-            print(f"[WARN] GPT-2 failed: {e}")
+            logger.warning("[WARN] GPT-2 failed: %s", e)
             return f"[AI Error] GPT-2 crashed: {str(e)}. Please use template mode instead."
+    # function that reads everything generate needs from database
+    # 1. get session with pre-detected phase and its recent messages (one query)
+    # 2. check that phase was detected
+    # 3. build AI context from messages (only ai and both modes use it)
+    # returns (session_data, None) on success or (None, error_result)
+    def _prepare(self, session_id, mode):
+        """Fetch session, phase and context for generate()"""
+        if not session_id:
+            return None, {'success': False, 'error': 'No session ID provided'}
+        
+        # get session with phase that phase detector stored in database earlier
+        # together with its recent messages (only AI uses them) in one query
+        latest = session_id == 'latest'
+        session_data = self.db.get_session_with_messages(
+            None if latest else session_id,
+            limit=10 if mode in ['ai', 'both'] else 0
+        )
+        
+        if not session_data:
+            if latest:
+                return None, {'success': False, 'error': 'No active sessions found'}
+            return None, {'success': False, 'error': f'Session {session_id} not found'}
+        # if phase not detected return error
+        if not session_data.get('phase'):
+            return None, {
+                'success': False, 
+                'error': 'Phase not detected yet. Run standalone phase detector first.',
+                'session_id': session_data['session_id']
+            }
+        # build context for AI generation from messages fetched with the session
+        # else empty string because only AI uses context
+        session_data['context'] = build_context(session_data['messages']) if mode in ['ai', 'both'] else ""
+        return session_data, None
     # function that generates response
     # takes inputs ===============================================
     # session_id from database or 'latest'
     # mode - template, ai or both from main() argparser
     # num_options - number of template options to generate from main() argparser
+    # prepared - optional result of _prepare() fetched ahead of time (see generate_many)
+    # async_ai - in both mode return and save template right away, AI response is
+    #            generated in background and saved to temp file when ready
     # =======================================================
-    # 1. Get session with pre-detected phase from database
+    # 1. Get session with pre-detected phase and its recent messages from database (one query)
     # 2. extract phase and confidence from session_data that was fetched with session_id
     # 3. Generate response based on mode (template or AI)
-    def generate(self, session_id='latest', mode='template', num_options=3):
+    def generate(self, session_id='latest', mode='template', num_options=3, prepared=None, async_ai=False):
         """
         Main generation function - NEW VERSION
         
@@ -326,62 +615,36 @@ Response:"""
         3. NO phase detection here - phase must be detected first!
         """
         
-        # Get session with phase from database
-        if session_id == 'latest':
-            latest = self.db.get_latest_session()
-            if latest:
-                session_id = latest['session_id']
-            else:
-                return {'success': False, 'error': 'No active sessions found'}
-        
-        if not session_id:
-            return {'success': False, 'error': 'No session ID provided'}
-        
-        # get session with phase that phase detector stored in database earlier
-        session_data = self.db.get_session_with_phase(session_id)
-        
-        if not session_data:
-            return {'success': False, 'error': f'Session {session_id} not found'}
-        # if phase not detected return error
-        if not session_data.get('phase'):
-            return {
-                'success': False, 
-                'error': 'Phase not detected yet. Run standalone phase detector first.',
-                'session_id': session_id
-            }
+        session_data, error = prepared if prepared is not None else self._prepare(session_id, mode)
+        if error:
+            return error
+        session_id = session_data['session_id']
         # extract phase and confidence from session_data that was fetched with session_id
         phase = session_data['phase']
         confidence = session_data['phase_confidence']
+        context = session_data['context']
         
-        print(f"\n[PHASE] {phase} ({confidence:.1%} confidence) - from database")
-        print(f"[SESSION] {session_id}")
-        
-        # if mode is set to ai or both
-        if mode in ['ai', 'both']:
-            # get context for AI generation
-            messages = self.db.get_recent_messages(session_id, limit=10)
-            context = "\n".join([f"{m['sender_type']}: {m['text']}" for m in messages])
-            # else return empty string because only AI uses context
-        else:
-            context = ""
+        logger.debug("[PHASE] %s (%.1f%% confidence) - from database", phase, confidence * 100)
+        logger.debug("[SESSION] %s", session_id)
         
         # Generate response based on mode
         # if template mode
         if mode == 'template':
             # response is generated template responses for phase
             responses = self.generate_template_response(phase, num_options)
-            print(f"[MODE] Template ({len(responses)} options)")
+            logger.debug("[MODE] Template (%d options)", len(responses))
             # elif mode is ai
         elif mode == 'ai':
             # response is generated AI response for phase and context
             ai_response = self.generate_ai_response(phase, context, session_id)
             responses = [ai_response]
-            print(f"[MODE] AI (GPT-2)")
+            logger.debug("[MODE] AI (GPT-2)")
             # if mode is both
         elif mode == 'both':
             template_response = self.generate_template_response(phase, 1)[0]
-            ai_response = self.generate_ai_response(phase, context, session_id)
-            print(f"[MODE] Both (Template + AI)")
+            # AI response follows later, dashboard shows template meanwhile
+            ai_response = None if async_ai else self.generate_ai_response(phase, context, session_id)
+            logger.debug("[MODE] Both (Template + AI)")
             # inside resulty put response and other fields
             result = {
                 'success': True,
@@ -392,7 +655,9 @@ Response:"""
                 'session_id': session_id
             }
             # Save to temp file for dashboard
-            self.save_to_temp_file(result)
+            save_id = self.save_to_temp_file(result)
+            if async_ai:
+                self._executor.submit(self._finish_ai, dict(result), context, save_id)
             return result
         # else return error for invalid mode
         else:
@@ -411,6 +676,52 @@ Response:"""
         # Save to temp file for dashboard
         self.save_to_temp_file(result)
         return result
+    # background part of async 'both' mode
+    # 1. generate AI response for the already saved template result
+    # 2. save again unless a newer result was saved in the meantime
+    def _finish_ai(self, result, context, save_id):
+        """Generate AI response and add it to the saved temp file"""
+        result['ai_response'] = self.generate_ai_response(result['phase'], context, result['session_id'])
+        with self._temp_lock:
+            if self._temp_saves == save_id:
+                self._write_temp_file(result)
+            else:
+                logger.debug("[SAVE] Newer result saved, AI response for %s not written", result['session_id'])
+        return result
+    # function that generates responses for several sessions in a row
+    # 1. background thread fetches next session from database
+    # 2. meanwhile current session is generated (GPT-2 in ai/both mode)
+    # 3. yields one result per session in input order
+    def generate_many(self, session_ids, mode='template', num_options=3):
+        """Generate for many sessions, prefetching the next one"""
+        if not session_ids:
+            return
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_ready = executor.submit(self._prepare, session_ids[0], mode)
+            for i, session_id in enumerate(session_ids):
+                prepared = next_ready.result()
+                if i + 1 < len(session_ids):
+                    next_ready = executor.submit(self._prepare, session_ids[i + 1], mode)
+                yield self.generate(session_id, mode, num_options, prepared=prepared)
+
+# lazy factory that holds one GPT-2 generator per process
+# first call loads tokenizer and weights, every next call reuses them
+# lock makes sure concurrent first callers don't load the model twice
+_GPT2_SINGLETON = None
+_GPT2_LOCK = threading.Lock()
+
+def get_gpt2_generator():
+    """Return shared GPT-2 generator (loaded on first use)"""
+    global _GPT2_SINGLETON
+    if _GPT2_SINGLETON is None:
+        with _GPT2_LOCK:
+            if _GPT2_SINGLETON is None:
+                generator = SmartChatResponse.ChatGPT2Generator()
+                # prefill static prompt part once, requests only prefill their tail
+                generator.set_system_prefix(_PROMPT_PREFIX)
+                _GPT2_SINGLETON = generator
+    return _GPT2_SINGLETON
+
 # main function
 # 1. takes arguments that you pass from command line
 # 2. make result var for SmartChatResponse class instance and put arguments or defaults to generate function
@@ -423,14 +734,46 @@ def main():
     parser.add_argument('--session-id', default='latest')
     parser.add_argument('--mode', choices=['template', 'ai', 'both'], default='template')
     parser.add_argument('--num-options', type=int, default=3)
+    parser.add_argument('--sessions', nargs='+',
+                        help='Generate for several session ids, one JSON line per session')
+    parser.add_argument('--async-ai', action='store_true',
+                        help="In both mode save template right away and add AI response when ready")
+    parser.add_argument('--serve', action='store_true',
+                        help='Keep process alive and read one session id per stdin line')
     # inside var put all the arguments from argparser
     args = parser.parse_args()
     
+    # Set UTF-8 encoding
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding='utf-8')
+    # diagnostics to stdout like the prints, DEBUG shows per-request details
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                        format='%(message)s', stream=sys.stdout)
+    # GPT-2 only generates here: limit torch threads (TORCH_NUM_THREADS env to override)
+    # template mode never loads torch, so it is only imported for ai/both
+    if args.mode != 'template':
+        _import_ml_libs()
+        torch.set_num_threads(int(os.environ.get('TORCH_NUM_THREADS', min(4, os.cpu_count() or 4))))
+    
     try:
         # inside var put SmartChatResponse class instance
         generator = SmartChatResponse()
+        # several sessions: next session is fetched while current one generates
+        if args.sessions:
+            for result in generator.generate_many(args.sessions, args.mode, args.num_options):
+                print(json.dumps(result, ensure_ascii=False), flush=True)
+            return 0
+        # serve mode: one process answers many requests so GPT-2 loads only once
+        # every stdin line is a session id, every answer is one JSON line
+        if args.serve:
+            for line in sys.stdin:
+                session_id = line.strip() or 'latest'
+                result = generator.generate(session_id, args.mode, args.num_options, async_ai=args.async_ai)
+                print(json.dumps(result, ensure_ascii=False), flush=True)
+            return 0
         # feed the arguments to generate function of SmartChatResponse instance generator
-        result = generator.generate(args.session_id, args.mode, args.num_options)
+        # (with --async-ai the process stays alive until background AI response is saved)
+        result = generator.generate(args.session_id, args.mode, args.num_options, async_ai=args.async_ai)
         # log everything for debugging
         print("\n" + "="*60)
         if result['success']:
@@ -440,7 +783,7 @@ def main():
                 print(f"\nTemplate Response:")
                 print(f"• {result['template_response']}\n")
                 print(f"AI Response:")
-                print(f"• {result['ai_response']}\n")
+                print(f"• {result['ai_response'] or '(generating in background)'}\n")
             else:
                 print(f"\nResponses:\n")
                 for i, resp in enumerate(result['responses'], 1):
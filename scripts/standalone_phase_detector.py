@@ -5,17 +5,69 @@ Separates phase detection from response generation for efficiency
 import sys
 import os
 import json
+import hashlib
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+import time
+from concurrent.futures import Future
 from datetime import datetime
 
-# Set UTF-8 encoding
-if sys.platform == "win32":
-    sys.stdout.reconfigure(encoding='utf-8')
+# keep torch.compile (inductor) kernels on disk so next process start reuses them
+# must be set before torch is imported, TORCHINDUCTOR_CACHE_DIR env still wins
+os.environ.setdefault(
+    "TORCHINDUCTOR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".torch_cache")
+)
+import torch
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from data.chat_database_manager import ChatDatabase
+from data.chat_database_manager import ChatDatabase, build_context
 from scripts.phase_detector import PhaseDetector
 
+# per-request diagnostics go through logging (LOG_LEVEL env, configured in main)
+logger = logging.getLogger(__name__)
+
+# number of detector replicas in the pool = max inferences at the same time
+# (PHASE_DETECTOR_REPLICAS env to override), one per GPU or a few on CPU
+def _default_replicas():
+    if torch.cuda.is_available():
+        return torch.cuda.device_count()
+    return min(4, os.cpu_count() or 1)
+
+# at least one, an empty pool would leave every request waiting forever
+PHASE_DETECTOR_REPLICAS = max(1, int(os.environ.get('PHASE_DETECTOR_REPLICAS', _default_replicas())))
+
+# device of replica i, replicas are spread round robin over the GPUs
+def _replica_device(index):
+    if torch.cuda.is_available():
+        return f"cuda:{index % torch.cuda.device_count()}"
+    return 'cpu'
+
+# intra-op threads for the process (TORCH_NUM_THREADS env to override)
+# on CPU replicas run side by side, each gets its share of the cores instead of 4 threads each
+def _default_num_threads():
+    cpus = os.cpu_count() or 1
+    if torch.cuda.is_available():
+        return min(4, cpus)
+    return max(1, min(4, cpus // PHASE_DETECTOR_REPLICAS))
+
+# identity of the loaded model: weight file + its mtime (retrain changes it), or base BERT,
+# plus whether keyword rules are on, phases detected by another model must not be reused
+def _model_key(detector):
+    if detector.weights_path and os.path.exists(detector.weights_path):
+        weights = f"{os.path.basename(detector.weights_path)}@{os.path.getmtime(detector.weights_path):.0f}"
+    else:
+        weights = 'base_bert'
+    return f"{weights}|rules={bool(detector.rules)}"
+
+# short content hash of a context and model key, stored with the detected phase
+# same hash next time means same messages and same model, so stored phase is still valid
+def _messages_hash(context, model_key=''):
+    return hashlib.blake2b(f"{model_key}\n{context}".encode('utf-8'), digest_size=16).hexdigest()
+
 class StandalonePhaseDetector:
 
     # init database and try to load model
@@ -26,6 +78,8 @@ class StandalonePhaseDetector:
     #5. put model in var
     #6. call PhaseDetector class to load model and its functions
     #7. print metadata info
+    #8. warm up compiled model so compile cost is paid at startup, not on first request
+    #9. first detector is replica 0 of the pool, the rest are built when concurrent requests need them
     def __init__(self):
         # var to hold root dir
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -41,44 +95,131 @@ class StandalonePhaseDetector:
         print("="*60)
         # Try to load trained model, fallback to base BERT if not found
         try:
+            # fixed pool of PHASE_DETECTOR_REPLICAS detectors (predict reuses per-detector buffers,
+            # so a replica serves one thread at a time), threads check one out and return it
+            # replicas are built lazily, once the pool is full callers wait for a free one
+            self._model_dir = model_dir
+            self._pool = queue.Queue()
+            self._replica_count = 0
+            self._replica_lock = threading.Lock()
+            # sessions being detected right now, same session requested again waits for that run
+            self._inflight = {}
+            self._inflight_lock = threading.Lock()
             # call PhaseDetector class and load model (with built-in fallback)
-            self.phase_detector = PhaseDetector(model_dir)
+            self.phase_detector = self._build_replica(warmup=False)
+            self._pool.put(self.phase_detector)
+            # part of the messages hash, stored phases from an older model get re-detected
+            self._model_key = _model_key(self.phase_detector)
             if hasattr(self.phase_detector, 'metadata') and self.phase_detector.metadata:
                 print("✅ TRAINED BERT PHASE DETECTOR LOADED")
                 print(f"   Accuracy: {self.phase_detector.metadata.get('accuracy')}%")
             else:
                 print("✅ BASE BERT PHASE DETECTOR LOADED (FALLBACK)")
                 print("   Note: Using untrained model - lower accuracy expected")
+            # compiled model captures its graph on first call, do it here once
+            if self.phase_detector.is_compiled:
+                print("[BERT] Warming up compiled model...")
+                start = time.perf_counter()
+                if self._warmup(self.phase_detector):
+                    # seconds here means a cold compile, well under a second means kernels came from cache
+                    print(f"[BERT] Warmup took {time.perf_counter() - start:.2f}s "
+                          f"(cache: {os.environ['TORCHINDUCTOR_CACHE_DIR']})")
             print("="*60 + "\n")
             # except on error
         except Exception as e:
             print(f"❌ ERROR loading BERT model: {e}")
             print("="*60 + "\n")
             raise
+    # warm up a compiled detector, compile errors (e.g. broken inductor backend) show up here
+    # on failure the detector falls back to its eager model instead of aborting the CLI
+    def _warmup(self, detector):
+        """Warm up compiled detector, return False if it fell back to eager"""
+        try:
+            detector.warmup()
+            return True
+        except Exception as e:
+            print(f"⚠️ Compiled model warmup failed, using eager model: {e}")
+            detector.use_eager()
+            return False
+    # build next replica of the pool (caller holds _replica_lock or is __init__)
+    #1. replica i runs on GPU i % device_count (CPU when there is no GPU)
+    #2. every replica has its own tokenizer, replicas run in parallel threads
+    #3. compiled replicas are warmed up before first use
+    def _build_replica(self, warmup=True):
+        """Create one PhaseDetector replica of the pool"""
+        detector = PhaseDetector(self._model_dir, device=_replica_device(self._replica_count),
+                                 shared_tokenizer=False)
+        self._replica_count += 1
+        if warmup and detector.is_compiled:
+            self._warmup(detector)
+        return detector
+    # check out a replica for the duration of one inference and put it back afterwards
+    # a free replica is reused, a new one is built while the pool is not full, otherwise wait
+    @contextmanager
+    def _replica(self):
+        """Borrow a PhaseDetector replica from the pool"""
+        try:
+            detector = self._pool.get_nowait()
+        except queue.Empty:
+            detector = None
+            with self._replica_lock:
+                if self._replica_count < PHASE_DETECTOR_REPLICAS:
+                    detector = self._build_replica()
+            if detector is None:
+                detector = self._pool.get()
+        try:
+            yield detector
+        finally:
+            self._pool.put(detector)
+    # run fn once per key at a time, concurrent callers with the same key
+    # wait for the running call and share its result (or exception)
+    def _single_flight(self, key, fn, *args):
+        """Deduplicate concurrent calls with the same key"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if leader:
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+        return future.result()
     # function to call detection and update db
     #1. get latest session from database manager
-    #2. get recent messages from database manager
-    #3. build context string by adding object fields into one line string for tokenization
-    #4. use predict function to get phase and confidence
-    #5. update database with detected phase and confidence
-    #6. log it
+    #2. concurrent requests for the same session share one detection run
+    #3. get recent messages from database manager
+    #4. build context string by adding object fields into one line string for tokenization
+    #5. if messages hash matches the one stored with the phase, return stored phase (no BERT run)
+    #6. use predict function to get phase and confidence
+    #7. update database with detected phase, confidence and messages hash
+    #8. log it
     def detect_and_update_phase(self, session_id='latest'):
         """Detect phase and update database (main function)"""
         # log the session id
-        print(f"[PHASE DETECT] Starting detection for session: {session_id}")
+        logger.debug("[PHASE DETECT] Starting detection for session: %s", session_id)
         
         # get latest session if 'latest' specified from database manager
         if session_id == 'latest':
             latest = self.db.get_latest_session()
             if latest:
                 session_id = latest['session_id']
-                print(f"[SESSION] Using latest session: {session_id}")
+                logger.debug("[SESSION] Using latest session: %s", session_id)
             else:
                 return {'success': False, 'error': 'No active sessions found'}
         # error if no session id
         if not session_id:
             return {'success': False, 'error': 'No session ID provided'}
         
+        return self._single_flight(session_id, self._detect_session, session_id)
+
+    def _detect_session(self, session_id):
+        """Detect phase for one resolved session id and update database"""
         # Get conversation context limit to last 10 messages
         messages = self.db.get_recent_messages(session_id, limit=10)
         # error if no messages
@@ -86,29 +227,44 @@ class StandalonePhaseDetector:
             return {'success': False, 'error': f'No messages found for session {session_id}'}
 
         # from database data make one line string from sender and text objects
-        context = "\n".join([f"{m['sender_type']}: {m['text']}" for m in messages])
+        context = build_context(messages)
+        logger.debug("[CONTEXT] %d messages, %d chars", len(messages), len(context))
         # limit context to 100 characters for logging
-        context_preview = context[:100] + "..." if len(context) > 100 else context
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[PREVIEW] %s", context[:100] + "..." if len(context) > 100 else context)
         
-        print(f"[CONTEXT] {len(messages)} messages, {len(context)} chars")
-        print(f"[PREVIEW] {context_preview}")
+        # messages unchanged since last detection, phase in database is still valid
+        messages_hash = _messages_hash(context, self._model_key)
+        stored = self.db.get_session_with_phase(session_id)
+        if stored and stored.get('phase') and stored.get('messages_hash') == messages_hash:
+            logger.info("[CACHED] Messages unchanged, phase: %s", stored['phase'])
+            return {
+                'success': True,
+                'session_id': session_id,
+                'phase': stored['phase'],
+                'confidence': stored['phase_confidence'],
+                'context_length': len(context),
+                'messages_count': len(messages),
+                'cached': True,
+                'timestamp': datetime.now().isoformat()
+            }
         
         # log that model is analyzing
-        print("[BERT] Analyzing conversation phase...")
+        logger.debug("[BERT] Analyzing conversation phase...")
         # use predict function that sets model to eval the input save output to var
-        phase_result = self.phase_detector.predict(context)
+        with self._replica() as detector:
+            phase_result = detector.predict(context)
         # extract phase and confidence from result
         phase = phase_result['phase']
         confidence = phase_result['confidence']
         # log it
-        print(f"[RESULT] Phase: {phase}")
-        print(f"[RESULT] Confidence: {confidence:.1%}")
+        logger.info("[RESULT] Phase: %s (%.1f%%)", phase, confidence * 100)
         
         # update database with detected phase and put it in success var
-        success = self.db.update_session_phase(session_id, phase, confidence)
+        success = self.db.update_session_phase(session_id, phase, confidence, messages_hash)
         # log success
         if success:
-            print(f"[SUCCESS] Database updated with phase: {phase}")
+            logger.debug("[SUCCESS] Database updated with phase: %s", phase)
             
             return {
                 'success': True,
@@ -125,6 +281,83 @@ class StandalonePhaseDetector:
                 'success': False,
                 'error': 'Failed to update database with detected phase'
             }
+
+    # function to detect phases for several sessions at once
+    #1. get recent messages for all sessions with one query
+    #2. build context string per session, skip sessions without messages
+    #   and sessions whose messages hash matches the stored one (stored phase is returned)
+    #3. run one batched predict for all contexts
+    #4. update database for all sessions in one transaction and collect results
+    def detect_and_update_phases(self, session_ids):
+        """Detect phases for many sessions in one model pass"""
+        logger.debug("[PHASE DETECT] Starting batch detection for %d sessions", len(session_ids))
+        
+        # one query for all sessions, limit to last 10 messages each
+        messages_by_session = self.db.get_recent_messages_bulk(session_ids, limit=10)
+        # stored phases with hashes of the messages they were detected from
+        stored_phases = self.db.get_session_phases(session_ids)
+        
+        results = []
+        batch_ids = []
+        contexts = []
+        hashes = []
+        timestamp = datetime.now().isoformat()
+        for session_id in session_ids:
+            messages = messages_by_session.get(session_id)
+            if not messages:
+                results.append({'success': False, 'session_id': session_id,
+                                'error': f'No messages found for session {session_id}'})
+                continue
+            context = build_context(messages)
+            messages_hash = _messages_hash(context, self._model_key)
+            # messages unchanged since last detection, keep stored phase
+            stored = stored_phases.get(session_id)
+            if stored and stored['phase'] and stored['messages_hash'] == messages_hash:
+                results.append({
+                    'success': True,
+                    'session_id': session_id,
+                    'phase': stored['phase'],
+                    'confidence': stored['phase_confidence'],
+                    'context_length': len(context),
+                    'messages_count': len(messages),
+                    'cached': True,
+                    'timestamp': timestamp
+                })
+                continue
+            batch_ids.append(session_id)
+            contexts.append(context)
+            hashes.append(messages_hash)
+        
+        if not contexts:
+            return results
+        
+        # log that model is analyzing
+        logger.debug("[BERT] Analyzing %d conversations in one batch...", len(contexts))
+        with self._replica() as detector:
+            phase_results = detector.predict_batch(contexts)
+        
+        # write all phases in one transaction, returns ids of sessions that still exist
+        updated = self.db.update_session_phases(
+            [(session_id, r['phase'], r['confidence'], h)
+             for session_id, r, h in zip(batch_ids, phase_results, hashes)]
+        )
+        
+        for session_id, context, phase_result in zip(batch_ids, contexts, phase_results):
+            if session_id in updated:
+                results.append({
+                    'success': True,
+                    'session_id': session_id,
+                    'phase': phase_result['phase'],
+                    'confidence': phase_result['confidence'],
+                    'context_length': len(context),
+                    'messages_count': len(messages_by_session[session_id]),
+                    'timestamp': timestamp
+                })
+            else:
+                results.append({'success': False, 'session_id': session_id,
+                                'error': 'Failed to update database with detected phase'})
+        
+        return results
 # use argparse library for starting process from command line
 def main():
     """Command line interface"""
@@ -133,13 +366,39 @@ def main():
     parser = argparse.ArgumentParser(description='Standalone Phase Detector')
     parser.add_argument('--session', default='latest', 
                        help='Session ID to analyze (default: latest)')
+    parser.add_argument('--sessions', nargs='+',
+                       help='Analyze several session IDs in one batch')
     parser.add_argument('--output', default='json',
                        help='Output format: json or simple (default: json)')
     
     args = parser.parse_args()
     
+    # Set UTF-8 encoding
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding='utf-8')
+    # diagnostics to stdout like the prints, DEBUG shows per-request details
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                        format='%(message)s', stream=sys.stdout)
+    # inference only process: cap intra-op threads (batch=1 gains nothing past ~4)
+    # set here and not at import so importing PhaseDetector leaves torch globals alone
+    # the pool is process wide and shared by all CPU replicas, so cores are split between them
+    torch.set_num_threads(int(os.environ.get('TORCH_NUM_THREADS', _default_num_threads())))
+    
     try:
         detector = StandalonePhaseDetector()
+        # batch mode: one model pass for all given sessions
+        if args.sessions:
+            results = detector.detect_and_update_phases(args.sessions)
+            if args.output == 'json':
+                print(json.dumps(results, indent=2, ensure_ascii=False))
+            else:
+                for result in results:
+                    if result['success']:
+                        print(f"✅ {result['session_id']}: {result['phase']} ({result['confidence']:.1%})")
+                    else:
+                        print(f"❌ {result['session_id']}: {result['error']}")
+            return
+        
         result = detector.detect_and_update_phase(args.session)
         
         if args.output == 'json':